@@ -22,13 +22,26 @@ def extract_messages(history: dict):
         role = it.get("role") or it.get("participant", {}).get("role")
         text_parts = []
         for content in it.get("content", []) or []:
-            text_value = content.get("text") or content.get("value") or content.get("content")
+            # ChatMessage хранит текст прямо строкой; dict-части (text/value) — из старых дампов
+            if isinstance(content, str):
+                text_value = content
+            elif isinstance(content, dict):
+                text_value = content.get("text") or content.get("value") or content.get("content")
+            else:
+                continue
             if isinstance(text_value, str) and text_value.strip():
                 text_parts.append(text_value.strip())
         text = " ".join(text_parts).strip()
         if text:
             yield role, text
 
+def load_history(src: Path) -> dict:
+    """Читаем транскрипт: NDJSON (по элементу на строку) или старый JSON-дамп {"items": [...]}."""
+    raw = src.read_text(encoding="utf-8")
+    if src.suffix == ".ndjson":
+        return {"items": [json.loads(line) for line in raw.splitlines() if line.strip()]}
+    return json.loads(raw)
+
 def render_html(messages):
     out = ['<!doctype html><meta charset="utf-8"><title>Transcript</title>',
            f"<style>{CSS}</style>", '<div class="wrap"><h1>Transcript</h1>']
@@ -43,11 +56,11 @@ def render_html(messages):
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python scripts/render_transcript.py logs/transcript_*.json")
+        print("Usage: python scripts/render_transcript.py logs/transcript_*.ndjson")
         sys.exit(1)
     src = Path(sys.argv[1])
     dst = src.with_suffix(".html")
-    history = json.loads(src.read_text(encoding="utf-8"))
+    history = load_history(src)
     html_out = render_html(list(extract_messages(history)))
     dst.write_text(html_out, encoding="utf-8")
     print(f"Written: {dst}")
@@ -2,27 +2,35 @@ import logging
 import os
 import sys
 import asyncio
-import json
+import contextlib
+import time
 from datetime import datetime
+from types import MappingProxyType
+from typing import Any
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
-from src.utils import read_text
+from src.config import load_config
+from src.utils import TranscriptWriter, json_dumps, read_text
 from livekit.agents import (
     NOT_GIVEN,
     Agent,
     AgentSession,
+    ConversationItemAddedEvent,
+    FunctionToolsExecutedEvent,
     JobContext,
     JobProcess,
     MetricsCollectedEvent,
     RoomInputOptions,
     RoomOutputOptions,
     RunContext,
+    UserInputTranscribedEvent,
     WorkerOptions,
     cli,
     metrics,
 )
 from livekit.agents import BackgroundAudioPlayer, AudioConfig, BuiltinAudioClip
+from livekit.agents.voice.transcription.filters import filter_emoji, filter_markdown
 # from livekit.agents.llm import function_tool  # больше не нужно
 from livekit.plugins import azure, noise_cancellation, openai, silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
@@ -31,14 +39,16 @@ from livekit.plugins.azure.tts import StyleConfig, ProsodyConfig
 # 🔽 добавили импорт наших тулзов
 from speech import (
     build_ssml,
-    humanize_slots,
+    has_clock_time,
+    lang_switch_target,
     normalize_lang_tag,
+    precompile_rewriters,
     register_thinking_bridge,
-    replace_time_with_words,
-    summarize_hours,
+    rewrite_times,
 )
 from tools.barber import (
     load_barber_db,
+    set_external_db,
     get_services,
     get_price,
     get_open_hours,
@@ -50,31 +60,169 @@ from tools.barber import (
     remember_contact,
 )
 from tools.gcal import create_booking, cancel_booking, find_booking_by_phone, reschedule_booking
+from clients import n8n as n8n_client
 
 logger = logging.getLogger("agent")
 
 load_dotenv(".env.local")
 
-_SIMPLE_CONSOLE = os.getenv("AGENT_CONSOLE_SIMPLE", "").lower() in {"1", "true", "yes"}
+# Снимок окружения (после .env.local) — дальше читаем только атрибуты конфига
+_CONFIG = load_config()
+
+_SIMPLE_CONSOLE = _CONFIG.simple_console
 if _SIMPLE_CONSOLE:
     logging.getLogger().setLevel(logging.WARNING)
     logging.getLogger("livekit").setLevel(logging.WARNING)
     logging.getLogger("asyncio").setLevel(logging.WARNING)
 
+# Словари подсказок для Azure STT по языкам — собираются один раз на процесс
+_AZURE_PHRASES_BY_LANG = MappingProxyType(
+    {
+        "es": (
+            "Betrán",
+            "Betrán Estilistas",
+            "Puerto de Sagunto",
+            "Sagunto",
+            "Valencia",
+            "cita",
+            "corte",
+            "barba",
+        ),
+        # RU доменные слова (улучшают качество распознавания + детект языка)
+        "ru": (
+            "Бетран",
+            "Бетран Эстилистас",
+            "Пуэрто де Сагунто",
+            "записаться",
+            "стрижка",
+            "борода",
+            "окрашивание",
+            "укладка",
+        ),
+        # EN fallback
+        "en": (
+            "appointment",
+            "booking",
+            "haircut",
+        ),
+    }
+)
+# STT у нас многоязычный (es/ru/en с автодетектом) — ему нужен общий список
+_AZURE_PHRASE_LIST: tuple[str, ...] = tuple(
+    phrase for phrases in _AZURE_PHRASES_BY_LANG.values() for phrase in phrases
+)
+
+# --- Языковые голоса (Azure TTS) ---
+_VOICE_BY_LANG = _CONFIG.voice_by_lang
+# Короткий код языка → полный тег для Azure TTS
+_LANG_FULL = MappingProxyType({"es": "es-ES", "ru": "ru-RU", "en": "en-US"})
+# Однократное подтверждение смены языка
+_LANG_SWITCH_ACK = MappingProxyType(
+    {
+        "es": "Perfecto, hablamos en español.",
+        "ru": "Хорошо, переключаюсь на русский.",
+        "en": "Great, switching to English.",
+    }
+)
+
+
+# Системный промпт статичен на время жизни процесса — читаем файл один раз при импорте
+_SYSTEM_PROMPT = read_text("prompts/system.txt")
+
+
+def _read_spanish_greeting() -> str:
+    try:
+        g = read_text("prompts/greeting.txt") or ""
+    except OSError:
+        g = ""
+    if g:
+        parts = g.strip().splitlines()
+        buf = []
+        for line in parts:
+            if line.strip() == "":
+                break
+            buf.append(line)
+        if buf:
+            return "\n".join(buf).strip()
+    return "¡Hola! Soy tu asistente virtual. ¿En qué puedo ayudarte?"
+
+
+# Приветствие тоже статично: первый абзац greeting.txt считаем один раз
+_SPANISH_GREETING = _read_spanish_greeting()
+
+# Языковая оговорка, которая добавляется к инструкциям после автосмены языка
+_LANG_CLAUSES = {
+    "es": "Responde en español de forma natural y concisa.",
+    "ru": "Отвечай по-русски, кратко и естественно.",
+    "en": "Respond in natural, concise English.",
+}
+
+_APP_TZ_NAME = _CONFIG.app_tz
+_APP_TZ = ZoneInfo(_APP_TZ_NAME)
+# Строка текущего времени для промпта; 60 секунд устаревания модель не заметит
+_NOW_TTL_S = 60.0
+_NOW_CACHE: dict[str, Any] = {"t": float("-inf"), "s": ""}
+
+
+def _now_str() -> str:
+    mono = time.monotonic()
+    if mono - _NOW_CACHE["t"] >= _NOW_TTL_S:
+        now = datetime.now(_APP_TZ)
+        # То же, что strftime("%Y-%m-%d %H:%M"), но без locale-зависимого strftime
+        _NOW_CACHE["s"] = (
+            f"{now.year:04d}-{now.month:02d}-{now.day:02d} {now.hour:02d}:{now.minute:02d}"
+        )
+        _NOW_CACHE["t"] = mono
+    return _NOW_CACHE["s"]
+
+
+# Каталог для транскриптов создаём один раз при импорте, а не на каждом завершении
+_LOG_DIR = "logs"
+try:
+    os.makedirs(_LOG_DIR, exist_ok=True)
+    _LOG_DIR_READY = True
+except OSError:
+    _LOG_DIR_READY = False
+
+
+_INSTRUCTIONS_CACHE: dict[str, str] = {"now": "", "text": ""}
+
 
 def _build_instructions() -> str:
     """Формируем динамические инструкции с учётом текущей даты/времени."""
-    tz = os.getenv("APP_TZ", "Europe/Madrid")
-    now = datetime.now(ZoneInfo(tz))
-    now_str = now.strftime("%Y-%m-%d %H:%M")
-    base_instructions = read_text("prompts/system.txt")
-    dynamic_tail = (
-        f"\n\nТекущее локальное время: {now_str} ({tz}). "
-        "Интерпретируй слова 'сегодня/завтра' относительно этой временной зоны. "
-        "Всегда проверяй факты через доступные инструменты, прежде чем отвечать."
+    now_str = _now_str()
+    # Пока строка времени не сменилась, инструкции те же — не склеиваем их заново
+    if now_str == _INSTRUCTIONS_CACHE["now"]:
+        return _INSTRUCTIONS_CACHE["text"]
+    dynamic_tail = "".join(
+        (
+            "\n\nТекущее локальное время: ",
+            now_str,
+            " (",
+            _APP_TZ_NAME,
+            "). Интерпретируй слова 'сегодня/завтра' относительно этой временной зоны. "
+            "Всегда проверяй факты через доступные инструменты, прежде чем отвечать.",
+        )
     )
-    if base_instructions:
-        return base_instructions + dynamic_tail
+    text = _SYSTEM_PROMPT + dynamic_tail if _SYSTEM_PROMPT else dynamic_tail.lstrip()
+    _INSTRUCTIONS_CACHE["now"] = now_str
+    _INSTRUCTIONS_CACHE["text"] = text
+    return text
+
+
+# Частичные транскрипты в консоли: не чаще раза в 100 мс, если текст не вырос на 20+ символов
+_PARTIAL_MIN_INTERVAL_S = 0.1
+_PARTIAL_MIN_GROWTH = 20
+
+# Признак вопроса в конце реплики ассистента (после снятия закрывающих символов)
+_QUESTION_MARKS = frozenset("?¿")
+_QUESTION_TAIL_STRIP = " \t\r\n\"'»”)…"
+
+# Границы предложений для tts_node (перевод строки не граница: им разделяют списки слотов)
+_SENTENCE_ENDS = ".!?…"
+_TTS_MAX_HOLD_CHARS = 240
+
+
 class Assistant(Agent):
     def __init__(self, instructions: str) -> None:
         super().__init__(
@@ -95,49 +243,82 @@ class Assistant(Agent):
                 reschedule_booking,
             ],
         )
+        # Настройки пост-обработки TTS читаем из .env один раз, а не на каждый чанк
+        self._humanize = _CONFIG.humanize_slots
+        self._summarize_hours = _CONFIG.summarize_hours
+        self._use_ssml = _CONFIG.slots_ssml
+        # Просодия SSML — те же проверенные значения, что ушли в плагин TTS
+        self._ssml_opts = {
+            "rate": _CONFIG.tts_rate,
+            "pitch": _CONFIG.tts_pitch,
+            "volume": _CONFIG.tts_volume,
+            "style": _CONFIG.tts_style,
+            "degree": str(_CONFIG.tts_style_degree),
+        }
         # Текущий язык TTS для humanize/SSML; обновляется при переключении
         self.tts_lang = "es-ES"
 
+    @property
+    def tts_lang(self) -> str:
+        return self._tts_lang
+
+    @tts_lang.setter
+    def tts_lang(self, value: str) -> None:
+        # Короткий код языка считаем при смене языка, а не на каждый чанк
+        self._tts_lang = value or "es-ES"
+        self._lang_short = normalize_lang_tag(self._tts_lang)
+
     # Лёгкая пост-обработка текста перед синтезом: humanize слотов и, опционально, SSML
     def tts_node(self, text, model_settings):  # type: ignore[override]
-        from livekit.agents.voice.agent import Agent as _BaseAgent
-        from livekit.agents.voice.transcription.filters import filter_markdown, filter_emoji
-
-        humanize_enabled = os.getenv("TTS_HUMANIZE_SLOTS", "1").lower() in {"1", "true", "yes"}
-        summarize_enabled = os.getenv("TTS_SUMMARIZE_HOURS", "1").lower() in {"1", "true", "yes"}
-        use_ssml = os.getenv("TTS_SLOTS_SSML", "0").lower() in {"1", "true", "yes"}
+        humanize_enabled = self._humanize
+        summarize_enabled = self._summarize_hours
+        use_ssml = self._use_ssml
+        ssml_opts = self._ssml_opts
+        lang_long = self._tts_lang
+        lang_short = self._lang_short
+
+        # Без humanize и сводки часов чанки не переписываются (а SSML оборачивает только
+        # переписанные) — собственный генератор не нужен, оставляем штатные фильтры
+        if not (humanize_enabled or summarize_enabled):
+            return Agent.default.tts_node(
+                self, filter_emoji(filter_markdown(text)), model_settings
+            )
 
-        # Map to short code
-        lang_long = getattr(self, "tts_lang", "es-ES") or "es-ES"
-        lang_short = "es"
-        if lang_long.startswith("ru"):
-            lang_short = "ru"
-        elif lang_long.startswith("en"):
-            lang_short = "en"
+        def _rewrite(s: str) -> str:
+            # Без «цифра:цифра» нет ни времени, ни часов работы — отдаём как есть
+            if not has_clock_time(s):
+                return s
+            # Один проход: часы работы, списки слотов и одиночное время
+            s, changed = rewrite_times(
+                s,
+                lang_short,
+                humanize=humanize_enabled,
+                summarize=summarize_enabled,
+            )
+            if use_ssml and changed:
+                return build_ssml(s, lang_long, **ssml_opts)
+            return s
 
         async def _gen():
+            # LLM стримит токены, и «10:30» может прийти как «10» + «:» + «30».
+            # Копим текст до конца предложения и переписываем его целиком; Azure TTS
+            # всё равно синтезирует по предложениям, так что первый звук не задерживается
+            buf = ""
             async for chunk in text:
-                s = str(chunk)
-                changed = False
-                if humanize_enabled:
-                    s, changed = humanize_slots(s, lang_short)
-                    replaced = replace_time_with_words(s, lang_short)
-                    if replaced != s:
-                        s = replaced
-                        changed = True
-                if summarize_enabled:
-                    s2, changed2 = summarize_hours(s, lang_short)
-                    if changed2:
-                        s = s2
-                        changed = True
-                if use_ssml and changed:
-                    yield build_ssml(s, lang_long)
-                else:
-                    yield s
+                buf += str(chunk)
+                cut = max(buf.rfind(ch) for ch in _SENTENCE_ENDS) + 1
+                if not cut and len(buf) > _TTS_MAX_HOLD_CHARS:
+                    # Очень длинная фраза без точки — режем по последнему пробелу
+                    cut = buf.rfind(" ") + 1
+                if cut:
+                    yield _rewrite(buf[:cut])
+                    buf = buf[cut:]
+            if buf:
+                yield _rewrite(buf)
 
         # Пропускаем через штатные фильтры (markdown/emoji), чтобы TTS не озвучивал эмодзи словами
         filtered = filter_emoji(filter_markdown(_gen()))
-        return _BaseAgent.default.tts_node(self, filtered, model_settings)
+        return Agent.default.tts_node(self, filtered, model_settings)
 
 
 def prewarm(proc: JobProcess):
@@ -147,99 +328,51 @@ def prewarm(proc: JobProcess):
         prefix_padding_duration=0.4,
     )
     proc.userdata["barber_db"] = load_barber_db("db/barber")  # ← добавили
+    # инструменты берут базу из модуля, без get_job_context() на каждый вызов
+    set_external_db(proc.userdata["barber_db"])
+    # Регэкспы пост-обработки TTS компилируем здесь, а не на первом чанке первой сессии
+    precompile_rewriters(
+        humanize=_CONFIG.humanize_slots, summarize=_CONFIG.summarize_hours
+    )
 
 
-async def entrypoint(ctx: JobContext):
-    ctx.log_context_fields = {"room": ctx.room.name}
-
-    # --- Языковые голоса (Azure TTS) ---
-    VOICE_BY_LANG = {
-        # Более естественные дефолтные голоса; можно переопределить в .env.local
-        "es": os.getenv("AZURE_TTS_VOICE_ES", "es-ES-AlvaroNeural"),
-        "ru": os.getenv("AZURE_TTS_VOICE_RU", "ru-RU-DmitryNeural"),
-        "en": os.getenv("AZURE_TTS_VOICE_EN", "en-US-JennyNeural"),
-    }
-
-    # --- Параметры TTS (стиль/просодия) из .env ---
-    def _env_choice(var: str, allowed: set[str], default: str) -> str:
-        v = (os.getenv(var) or default).strip().lower()
-        return v if v in allowed else default
-
-    def _env_float(var: str, default: float) -> float:
-        raw = os.getenv(var)
-        if not raw:
-            return default
+def _prewarm_plugins(session: AgentSession) -> None:
+    """Открываем соединения плагинов заранее (prewarm() — неблокирующий, no-op если не поддержан)."""
+    for plugin in (session.tts, session.llm, session.stt):
+        prewarm_fn = getattr(plugin, "prewarm", None)
+        if prewarm_fn is None:
+            continue
         try:
-            return float(raw)
+            prewarm_fn()
         except Exception:
-            return default
+            logger.debug("prewarm failed for %s", type(plugin).__name__, exc_info=True)
 
-    # Допустимые значения, соответствующие ProsodyConfig
-    _ALLOWED_RATE = {"x-slow", "slow", "medium", "fast", "x-fast"}
-    _ALLOWED_PITCH = {"x-low", "low", "medium", "high", "x-high"}
-    _ALLOWED_VOLUME = {"silent", "x-soft", "soft", "medium", "loud", "x-loud"}
 
-    TTS_STYLE = os.getenv("TTS_STYLE", "chat")
-    TTS_STYLE_DEGREE = _env_float("TTS_STYLE_DEGREE", 1.0)
-    TTS_RATE = _env_choice("TTS_PROSODY_RATE", _ALLOWED_RATE, "fast")
-    TTS_PITCH = _env_choice("TTS_PROSODY_PITCH", _ALLOWED_PITCH, "medium")
-    TTS_VOLUME = _env_choice("TTS_PROSODY_VOLUME", _ALLOWED_VOLUME, "medium")
-
-    def _read_spanish_greeting() -> str:
-        g = read_text("prompts/greeting.txt") or ""
-        if g:
-            parts = g.strip().splitlines()
-            buf = []
-            for line in parts:
-                if line.strip() == "":
-                    break
-                buf.append(line)
-            if buf:
-                return "\n".join(buf).strip()
-        return "¡Hola! Soy tu asistente virtual. ¿En qué puedo ayudarte?"
+async def entrypoint(ctx: JobContext):
+    ctx.log_context_fields = {"room": ctx.room.name}
+    # Время старта сессии (в APP_TZ) — им помечаются все артефакты сессии при завершении
+    session_ts = datetime.now(_APP_TZ).strftime("%Y%m%d_%H%M%S")
 
     # --- Сессия с авто-детектом языка (RU/ES/EN) и стартовым испанским TTS ---
     session = AgentSession(
         stt=azure.STT(
-            speech_key=os.getenv("AZURE_SPEECH_KEY"),
-            speech_region=os.getenv("AZURE_SPEECH_REGION", "francecentral"),
+            speech_key=_CONFIG.speech_key,
+            speech_region=_CONFIG.speech_region,
             language=["es-ES", "ru-RU", "en-US"],
             explicit_punctuation=True,
-            phrase_list=[
-                "Betrán",
-                "Betrán Estilistas",
-                "Puerto de Sagunto",
-                "Sagunto",
-                "Valencia",
-                "cita",
-                "corte",
-                "barba",
-                # RU доменные слова (улучшают качество распознавания + детект языка)
-                "Бетран",
-                "Бетран Эстилистас",
-                "Пуэрто де Сагунто",
-                "записаться",
-                "стрижка",
-                "борода",
-                "окрашивание",
-                "укладка",
-                # EN fallback
-                "appointment",
-                "booking",
-                "haircut",
-            ],
+            phrase_list=list(_AZURE_PHRASE_LIST),
         ),
         tts=azure.TTS(
-            speech_key=os.getenv("AZURE_SPEECH_KEY"),
-            speech_region=os.getenv("AZURE_SPEECH_REGION", "francecentral"),
+            speech_key=_CONFIG.speech_key,
+            speech_region=_CONFIG.speech_region,
             language="es-ES",
-            voice=VOICE_BY_LANG["es"],
+            voice=_VOICE_BY_LANG["es"],
         ),
         llm=openai.LLM.with_azure(
-            azure_deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o"),
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("OPENAI_API_VERSION", "2024-10-21"),
+            azure_deployment=_CONFIG.openai_deployment,
+            azure_endpoint=_CONFIG.openai_endpoint,
+            api_key=_CONFIG.openai_api_key,
+            api_version=_CONFIG.openai_api_version,
             temperature=0.3,
         ),
         turn_detection=MultilingualModel(),
@@ -259,9 +392,12 @@ async def entrypoint(ctx: JobContext):
         max_tool_steps=4,
     )
 
+    # Прогреваем соединения TTS/LLM/STT сразу, параллельно со стартом сессии —
+    # приветствие и первый ответ не платят за DNS/TLS холодного старта
+    _prewarm_plugins(session)
+
     # Опционально: задержать preemptive_generation на первый ход, чтобы избежать гонок
-    _delay_preemptive_first = (os.getenv("AGENT_PREEMPTIVE_DELAY_FIRST_TURN", "0").lower() in {"1", "true", "yes"})
-    _preemptive_gate = {"armed": _delay_preemptive_first}
+    _preemptive_gate = {"armed": _CONFIG.delay_preemptive_first}
     if _preemptive_gate["armed"]:
         # временно выключаем — включим после первой финальной реплики пользователя
         try:
@@ -280,9 +416,13 @@ async def entrypoint(ctx: JobContext):
         usage_collector.collect(ev.metrics)
 
     # ======== ЛОГИ ТЕКСТА: компактно ========
-    _partial = {"active": False, "len": 0}
+    _partial = {"active": False, "len": 0, "txt_len": 0, "last_write": 0.0}
     interaction = {"awaiting_user": False}
     _last_user_final = {"t": 0.0}
+    # Автосмена языка после первой фразы пользователя — синхронный колбэк + async задача
+    lang_state = {"current": "es", "switched_once": False, "last_raw": None}
+    # Последние значения, отправленные в TTS (сессия стартует с es-ES)
+    _tts_state = {"lang": "es-ES", "voice": _VOICE_BY_LANG["es"]}
 
     def _clear_partial_line():
         if _partial["active"]:
@@ -290,72 +430,168 @@ async def entrypoint(ctx: JobContext):
             sys.stdout.flush()
             _partial["active"] = False
             _partial["len"] = 0
+            _partial["txt_len"] = 0
+
+    async def _update_instructions(detected: str) -> None:
+        await assistant.update_instructions(instructions_by_lang[detected])
+        lang_state["instructions_lang"] = detected
+
+    async def _apply_lang_switch(detected: str):
+        """Асинхронная часть переключения языка/голоса и обновления инструкций."""
+        # 1) TTS: язык и голос
+        lang_full = _LANG_FULL.get(detected, "es-ES")
+        voice = _VOICE_BY_LANG.get(detected, _VOICE_BY_LANG["es"])
+        # Перенастраиваем TTS только если язык/голос действительно меняются
+        if (lang_full, voice) != (_tts_state["lang"], _tts_state["voice"]):
+            session.tts.update_options(language=lang_full, voice=voice)
+            _tts_state["lang"] = lang_full
+            _tts_state["voice"] = voice
+        # keep assistant language for TTS post-processing
+        assistant.tts_lang = lang_full
+        # 2) LLM: целевой язык ответа и 3) однократное подтверждение — независимы,
+        # поэтому обновление инструкций идёт параллельно с озвучкой подтверждения
+        pending = []
+        if lang_state.get("instructions_lang") != detected:
+            pending.append(_update_instructions(detected))
+        if not lang_state["switched_once"]:
+            lang_state["switched_once"] = True
+            pending.append(session.say(_LANG_SWITCH_ACK[detected]))
+        if pending:
+            await asyncio.gather(*pending)
+        lang_state["current"] = detected
+        # Если мы задерживали preemptive для первого хода — включим его после подтверждения
+        if _preemptive_gate["armed"]:
+            try:
+                session.options.preemptive_generation = True  # type: ignore[attr-defined]
+            except Exception:
+                pass
+            _preemptive_gate["armed"] = False
 
     @session.on("user_input_transcribed")
-    def _on_user_input_transcribed(ev):
-        txt = getattr(ev, "transcript", "") or ""
+    def _on_user_input_transcribed(ev: UserInputTranscribedEvent):
+        """Один обработчик на событие: лог реплики и, на финале, проверка смены языка."""
+        # UserInputTranscribedEvent всегда несёт transcript/is_final — читаем напрямую
+        txt = ev.transcript
         if not txt:
             return
+        is_final = ev.is_final
+
+        if not is_final:
+            if not _SIMPLE_CONSOLE:
+                # Не чаще ~10 раз в секунду, если текст заметно не вырос
+                now = time.monotonic()
+                if (
+                    now - _partial["last_write"] < _PARTIAL_MIN_INTERVAL_S
+                    and len(txt) - _partial["txt_len"] <= _PARTIAL_MIN_GROWTH
+                ):
+                    return
+                s = f"USER(partial): {txt}"
+                sys.stdout.write("\r" + s)
+                sys.stdout.flush()
+                _partial["active"] = True
+                _partial["len"] = len(s)
+                _partial["txt_len"] = len(txt)
+                _partial["last_write"] = now
+            return
 
+        interaction["awaiting_user"] = False
+        _last_user_final["t"] = time.monotonic()
         if _SIMPLE_CONSOLE:
-            if getattr(ev, "is_final", False):
-                print(f"USER: {txt}", flush=True)
+            print(f"USER: {txt}", flush=True)
         else:
-            if getattr(ev, "is_final", False):
+            _clear_partial_line()
+            logger.info(f"USER: {txt}")
+
+        # --- Автосмена языка: синхронная проверка, async‑задача при необходимости ---
+        detected_tag = ev.language
+        if not detected_tag:
+            return
+        # Тот же сырой тег, что уже подтвердил текущий язык, не нормализуем повторно;
+        # тег помнится вместе с языком, так что возврат к прежнему языку не теряется
+        detected = lang_switch_target(lang_state, detected_tag)
+        if detected is None:
+            # Язык не сменился — если preemptive был задержан на первый ход, включим его теперь
+            if _preemptive_gate["armed"]:
                 try:
-                    _last_user_final["t"] = _time.monotonic()
+                    session.options.preemptive_generation = True  # type: ignore[attr-defined]
                 except Exception:
                     pass
-                interaction["awaiting_user"] = False
-                _clear_partial_line()
-                logger.info(f"USER: {txt}")
-            else:
-                s = f"USER(partial): {txt}"
-                sys.stdout.write("\r" + s)
-                sys.stdout.flush()
-                _partial["active"] = True
-                _partial["len"] = len(s)
+                _preemptive_gate["armed"] = False
+            return
+        asyncio.create_task(_apply_lang_switch(detected))
 
     @session.on("conversation_item_added")
-    def _on_conversation_item_added(ev):
-        item = getattr(ev, "item", None)
-        role = getattr(item, "role", None)
-        text = getattr(item, "text_content", None)
-        if role == "assistant" and text:
+    def _on_conversation_item_added(ev: ConversationItemAddedEvent):
+        item = ev.item
+        transcript.write(item)
+        try:
+            # В консоль выводим только реплики ассистента (role есть лишь у ChatMessage)
+            if item.role != "assistant":
+                return
+        except AttributeError:
+            return
+        text = item.text_content
+        if text:
             if _SIMPLE_CONSOLE:
                 print(f"ASSISTANT: {text}", flush=True)
             else:
                 _clear_partial_line()
                 logger.info(f"ASSISTANT: {text}")
-            # Если ассистент задал вопрос — ждём пользователя, не бриджим
-            try:
-                t = (text or "").strip()
-                if "?" in t or "¿" in t:
-                    interaction["awaiting_user"] = True
-            except Exception:
-                pass
+            # Если реплика ассистента заканчивается вопросом — ждём пользователя, не бриджим.
+            # Смотрим только хвост (без кавычек/скобок), а не сканируем весь текст
+            if text.rstrip(_QUESTION_TAIL_STRIP)[-1:] in _QUESTION_MARKS:
+                interaction["awaiting_user"] = True
+
+    @session.on("function_tools_executed")
+    def _on_function_tools_executed(ev: FunctionToolsExecutedEvent):
+        # Вызовы тулзов и их результаты в conversation_item_added не приходят —
+        # пишем их в транскрипт отсюда, парами «вызов → результат»
+        items = []
+        for call, output in ev.zipped():
+            items.append(call)
+            if output is not None:
+                items.append(output)
+        transcript.write(*items)
 
     async def log_usage():
+        if _SIMPLE_CONSOLE or not logger.isEnabledFor(logging.INFO):
+            return
         summary = usage_collector.get_summary()
-        if not _SIMPLE_CONSOLE:
-            logger.info(f"Usage: {summary}")
+        # UsageSummary — dataclass: пишем одной JSON-строкой, удобно грепать и парсить
+        try:
+            logger.info("Usage: %s", json_dumps(summary).decode("utf-8"))
+        except TypeError:
+            logger.info("Usage: %s", summary)
 
     ctx.add_shutdown_callback(log_usage)
 
-    # на завершение — сохраняем всю историю беседы в файл
-    async def _save_history():
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs("logs", exist_ok=True)
-        path = f"logs/transcript_{ctx.room.name}_{ts}.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(session.history.to_dict(), f, ensure_ascii=False, indent=2)
+    # транскрипт пишем по ходу сессии (NDJSON, по строке на элемент истории),
+    # а не одним большим дампом на завершении — на shutdown остаётся только close()
+    if not _LOG_DIR_READY:
+        os.makedirs(_LOG_DIR, exist_ok=True)
+    transcript_path = f"{_LOG_DIR}/transcript_{ctx.room.name}_{session_ts}.ndjson"
+    # Файл живёт дольше entrypoint (сессия идёт после return), поэтому контекст
+    # держим в ExitStack и закрываем в shutdown-колбэке — он вызывается при любом
+    # завершении задачи; каждая запись к тому же сразу сбрасывается на диск
+    _tx_stack = contextlib.ExitStack()
+    transcript = _tx_stack.enter_context(TranscriptWriter(transcript_path))
+
+    async def _close_transcript():
+        _tx_stack.close()
         if not _SIMPLE_CONSOLE:
-            logger.info(f"Transcript saved to {path}")
-    ctx.add_shutdown_callback(_save_history)
+            logger.info(f"Transcript saved to {transcript_path}")
+
+    ctx.add_shutdown_callback(_close_transcript)
+    # общий HTTP-клиент n8n закрывается, когда завершается последняя сессия процесса
+    ctx.add_shutdown_callback(n8n_client.retain())
 
     # Базовые инструкции + агент (будем обновлять инструкции при смене языка)
     base_instructions = _build_instructions()
     assistant = Assistant(instructions=base_instructions)
+    # Готовые инструкции на каждый язык — при переключении не склеиваем строки заново
+    instructions_by_lang = {
+        lang: f"{base_instructions}\n\n{clause}" for lang, clause in _LANG_CLAUSES.items()
+    }
 
     await session.start(
         agent=assistant,
@@ -369,7 +605,7 @@ async def entrypoint(ctx: JobContext):
     )
 
     # Фоновое «думание»: мягкое клавиатурное шуршание (в консоли не играет)
-    if (os.getenv("THINKING_BG_AUDIO", "0").lower() in {"1", "true", "yes"}) and not _SIMPLE_CONSOLE:
+    if _CONFIG.thinking_bg_audio and not _SIMPLE_CONSOLE:
         try:
             _bg = BackgroundAudioPlayer(
                 thinking_sound=[
@@ -382,82 +618,30 @@ async def entrypoint(ctx: JobContext):
         except Exception:
             pass
 
-    # 1) Стиль речи (из .env)
-    session.tts.update_options(style=StyleConfig(style=TTS_STYLE, degree=TTS_STYLE_DEGREE))
-
-    # 2) Просодия из .env
-    session.tts.update_options(prosody=ProsodyConfig(rate=TTS_RATE, pitch=TTS_PITCH, volume=TTS_VOLUME))
-
-    # Автосмена языка после первой фразы пользователя — синхронный колбэк + async задача
-    lang_state = {"current": "es", "switched_once": False}
+    # Стиль речи и просодия (из .env) — одним вызовом, без двойной перенастройки плагина
+    session.tts.update_options(
+        style=StyleConfig(style=_CONFIG.tts_style, degree=_CONFIG.tts_style_degree),
+        prosody=ProsodyConfig(
+            rate=_CONFIG.tts_rate, pitch=_CONFIG.tts_pitch, volume=_CONFIG.tts_volume
+        ),
+    )
 
-    register_thinking_bridge(
+    _stop_bridge = register_thinking_bridge(
         session,
         lang_state=lang_state,
         interaction_state=interaction,
         last_user_final_at=_last_user_final,
     )
-
-    async def _apply_lang_switch(detected: str):
-        """Асинхронная часть переключения языка/голоса и обновления инструкций."""
-        # 1) TTS: язык и голос
-        session.tts.update_options(
-            language={"es": "es-ES", "ru": "ru-RU", "en": "en-US"}[detected],
-            voice=VOICE_BY_LANG.get(detected, VOICE_BY_LANG["es"]),
-        )
-        # keep assistant language for TTS post-processing
-        try:
-            assistant.tts_lang = {"es": "es-ES", "ru": "ru-RU", "en": "en-US"}[detected]
-        except Exception:
-            assistant.tts_lang = "es-ES"
-        # 2) LLM: целевой язык ответа
-        lang_clause = {
-            "es": "Responde en español de forma natural y concisa.",
-            "ru": "Отвечай по-русски, кратко и естественно.",
-            "en": "Respond in natural, concise English.",
-        }[detected]
-        await assistant.update_instructions(f"{base_instructions}\n\n{lang_clause}")
-        # 3) Ненавязчивое подтверждение — только один раз
-        if not lang_state["switched_once"]:
-            ack = {
-                "es": "Perfecto, hablamos en español.",
-                "ru": "Хорошо, переключаюсь на русский.",
-                "en": "Great, switching to English.",
-            }[detected]
-        
-            await session.say(ack)
-            lang_state["switched_once"] = True
-        lang_state["current"] = detected
-        # Если мы задерживали preemptive для первого хода — включим его после подтверждения
-        if _preemptive_gate["armed"]:
-            try:
-                session.options.preemptive_generation = True  # type: ignore[attr-defined]
-            except Exception:
-                pass
-            _preemptive_gate["armed"] = False
-
-    @session.on("user_input_transcribed")
-    def _on_lang_autoswitch(ev):
-        """Синхронный колбэк: проверяем язык и запускаем async‑задачу при необходимости."""
-        if not getattr(ev, "is_final", False):
-            return
-        detected_tag = getattr(ev, "language", None)
-        if not detected_tag:
-            return
-        detected = normalize_lang_tag(detected_tag)
-        if detected == lang_state["current"]:
-            # Язык не сменился — если preemptive был задержан на первый ход, включим его теперь
-            if _preemptive_gate["armed"]:
-                try:
-                    session.options.preemptive_generation = True  # type: ignore[attr-defined]
-                except Exception:
-                    pass
-                _preemptive_gate["armed"] = False
-            return
-        asyncio.create_task(_apply_lang_switch(detected))
+    ctx.add_shutdown_callback(_stop_bridge)
 
     # Одно приветствие на испанском (берём первый абзац из greeting.txt)
-    greeting_es = _read_spanish_greeting()
+    greeting_es = _SPANISH_GREETING
+    if greeting_es and _CONFIG.greeting_concurrent_connect:
+        # Синтез приветствия и подключение к комнате независимы — выполняем параллельно
+        await asyncio.gather(
+            session.say(greeting_es, allow_interruptions=True), ctx.connect()
+        )
+        return
     if greeting_es:
         await session.say(greeting_es, allow_interruptions=True)
 
@@ -2,10 +2,70 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 import httpx
 
+try:  # HTTP/2 в httpx требует пакет h2; без него работаем по HTTP/1.1 keep-alive
+    import h2  # noqa: F401
+
+    _HTTP2 = True
+except ImportError:  # pragma: no cover
+    _HTTP2 = False
+
+# Один клиент на процесс: пул соединений переживает вызовы, TLS/DNS платим один раз
+_CLIENT: Optional[httpx.AsyncClient] = None
+# Сколько сессий сейчас держат клиент — закрываем его, только когда уходит последняя
+_SESSIONS = 0
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        timeout = httpx.Timeout(float(os.getenv("N8N_TIMEOUT", "3.0") or 3.0), connect=0.5)
+        user = os.getenv("N8N_USER")
+        pwd = os.getenv("N8N_PASS")
+        auth = (user, pwd) if (user and pwd) else None
+        _CLIENT = httpx.AsyncClient(
+            timeout=timeout,
+            auth=auth,
+            http2=_HTTP2,
+            limits=httpx.Limits(max_keepalive_connections=8),
+        )
+    return _CLIENT
+
+
+async def aclose() -> None:
+    """Закрыть общий клиент безусловно (для завершения процесса)."""
+    global _CLIENT
+    client, _CLIENT = _CLIENT, None
+    if client is not None:
+        await client.aclose()
+
+
+def retain() -> Callable[[], Awaitable[None]]:
+    """Отметить сессию как пользователя клиента; вернуть её shutdown-колбэк.
+
+    Колбэк закрывает общий клиент, только если других сессий в процессе не осталось,
+    поэтому завершение одной задачи не обрывает запросы параллельных.
+    """
+    global _SESSIONS
+    _SESSIONS += 1
+    released = False
+
+    async def release() -> None:
+        global _SESSIONS
+        nonlocal released
+        if released:
+            return
+        released = True
+        _SESSIONS -= 1
+        if _SESSIONS == 0:
+            await aclose()
+
+    return release
+
+
 def _url(path: str) -> str:
     base = (os.getenv("N8N_BASE") or "").rstrip("/")
     if not base:
@@ -16,14 +76,9 @@ def _url(path: str) -> str:
 
 
 async def _post(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-    timeout = httpx.Timeout(float(os.getenv("N8N_TIMEOUT", "3.0") or 3.0), connect=0.5)
-    user = os.getenv("N8N_USER")
-    pwd = os.getenv("N8N_PASS")
-    auth = (user, pwd) if (user and pwd) else None
-    async with httpx.AsyncClient(timeout=timeout, auth=auth) as cli:
-        resp = await cli.post(_url(path), json=payload)
-        resp.raise_for_status()
-        return resp.json()
+    resp = await _get_client().post(_url(path), json=payload)
+    resp.raise_for_status()
+    return resp.json()
 
 
 async def create_booking(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,103 @@
+"""Process-wide agent configuration, snapshotted from the environment once."""
+
+from __future__ import annotations
+
+import functools
+import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+# Допустимые значения, соответствующие ProsodyConfig
+ALLOWED_RATE = frozenset({"x-slow", "slow", "medium", "fast", "x-fast"})
+ALLOWED_PITCH = frozenset({"x-low", "low", "medium", "high", "x-high"})
+ALLOWED_VOLUME = frozenset({"silent", "x-soft", "soft", "medium", "loud", "x-loud"})
+
+_TRUTHY = frozenset({"1", "true", "yes"})
+
+
+def _env_flag(env: Mapping[str, str], var: str, default: str) -> bool:
+    return env.get(var, default).lower() in _TRUTHY
+
+
+def _env_choice(
+    env: Mapping[str, str], var: str, allowed: frozenset[str], default: str
+) -> str:
+    v = (env.get(var) or default).strip().lower()
+    return v if v in allowed else default
+
+
+def _env_float(env: Mapping[str, str], var: str, default: float) -> float:
+    raw = env.get(var)
+    if not raw:
+        return default
+    try:
+        return float(raw)
+    except Exception:
+        return default
+
+
+@dataclass(frozen=True)
+class AgentConfig:
+    # Консоль
+    simple_console: bool
+    app_tz: str
+    # Azure Speech / OpenAI
+    speech_key: Optional[str]
+    speech_region: str
+    openai_deployment: str
+    openai_endpoint: Optional[str]
+    openai_api_key: Optional[str]
+    openai_api_version: str
+    # Голоса и стиль/просодия TTS (проверенные значения для ProsodyConfig)
+    voice_by_lang: Mapping[str, str]
+    tts_style: str
+    tts_style_degree: float
+    tts_rate: str
+    tts_pitch: str
+    tts_volume: str
+    # Пост-обработка текста перед TTS (SSML берёт просодию из tts_* выше)
+    humanize_slots: bool
+    summarize_hours: bool
+    slots_ssml: bool
+    # Поведение сессии
+    delay_preemptive_first: bool
+    thinking_bg_audio: bool
+    greeting_concurrent_connect: bool
+
+
+@functools.lru_cache(maxsize=1)
+def load_config() -> AgentConfig:
+    """Read the environment once; call after ``load_dotenv``."""
+    env = os.environ
+    return AgentConfig(
+        simple_console=_env_flag(env, "AGENT_CONSOLE_SIMPLE", ""),
+        app_tz=env.get("APP_TZ", "Europe/Madrid"),
+        speech_key=env.get("AZURE_SPEECH_KEY"),
+        speech_region=env.get("AZURE_SPEECH_REGION", "francecentral"),
+        openai_deployment=env.get("AZURE_OPENAI_DEPLOYMENT", "gpt-4o"),
+        openai_endpoint=env.get("AZURE_OPENAI_ENDPOINT"),
+        openai_api_key=env.get("AZURE_OPENAI_API_KEY"),
+        openai_api_version=env.get("OPENAI_API_VERSION", "2024-10-21"),
+        voice_by_lang=MappingProxyType(
+            {
+                # Более естественные дефолтные голоса; можно переопределить в .env.local
+                "es": env.get("AZURE_TTS_VOICE_ES", "es-ES-AlvaroNeural"),
+                "ru": env.get("AZURE_TTS_VOICE_RU", "ru-RU-DmitryNeural"),
+                "en": env.get("AZURE_TTS_VOICE_EN", "en-US-JennyNeural"),
+            }
+        ),
+        tts_style=env.get("TTS_STYLE", "chat"),
+        tts_style_degree=_env_float(env, "TTS_STYLE_DEGREE", 1.0),
+        tts_rate=_env_choice(env, "TTS_PROSODY_RATE", ALLOWED_RATE, "fast"),
+        tts_pitch=_env_choice(env, "TTS_PROSODY_PITCH", ALLOWED_PITCH, "medium"),
+        tts_volume=_env_choice(env, "TTS_PROSODY_VOLUME", ALLOWED_VOLUME, "medium"),
+        humanize_slots=_env_flag(env, "TTS_HUMANIZE_SLOTS", "1"),
+        summarize_hours=_env_flag(env, "TTS_SUMMARIZE_HOURS", "1"),
+        slots_ssml=_env_flag(env, "TTS_SLOTS_SSML", "0"),
+        delay_preemptive_first=_env_flag(env, "AGENT_PREEMPTIVE_DELAY_FIRST_TURN", "0"),
+        thinking_bg_audio=_env_flag(env, "THINKING_BG_AUDIO", "0"),
+        greeting_concurrent_connect=_env_flag(
+            env, "AGENT_GREETING_CONCURRENT_CONNECT", "0"
+        ),
+    )
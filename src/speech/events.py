@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
 import os
 import time
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
 
 try:  # pragma: no cover - typing help only
     from livekit.agents import AgentStateChangedEvent, AgentSession
@@ -13,60 +15,140 @@ except Exception:  # pragma: no cover
     AgentSession = Any  # type: ignore
 
 
+_BRIDGE_PHRASES: Dict[str, str] = {
+    "ru": "Секунду, сверяюсь с расписанием…",
+    "es": "Un momento, reviso la agenda…",
+    "en": "One sec, checking the schedule…",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _bridge_timings_ms() -> Tuple[int, int]:
+    """(delay, cooldown) for thinking bridges, read from env once on first registration."""
+    delay = max(0, int(os.getenv("BRIDGE_THINKING_DELAY_MS", "600") or 600))
+    cooldown = max(0, int(os.getenv("BRIDGE_THINKING_COOLDOWN_MS", "2000") or 2000))
+    return delay, cooldown
+
+
 def register_thinking_bridge(
     session: "AgentSession",
     *,
     lang_state: Dict[str, Any],
     interaction_state: Dict[str, Any],
     last_user_final_at: Dict[str, float],
-) -> None:
-    """Register a handler that injects a short filler while the agent is thinking."""
+) -> Callable[[], Awaitable[None]]:
+    """Register a handler that injects a short filler while the agent is thinking.
 
-    bridge_delay_ms = max(0, int(os.getenv("BRIDGE_THINKING_DELAY_MS", "600") or 600))
-    bridge_cooldown_ms = max(0, int(os.getenv("BRIDGE_THINKING_COOLDOWN_MS", "2000") or 2000))
+    Bridges are spoken by a single consumer task fed through a one-slot queue, so
+    bursts of THINKING events (tool cascades) never overlap. Returns an async
+    callable that stops the consumer; register it as a shutdown callback.
+    """
+
+    bridge_delay_ms, bridge_cooldown_ms = _bridge_timings_ms()
+    bridge_delay_s = bridge_delay_ms / 1000.0
+    bridge_cooldown_s = bridge_cooldown_ms / 1000.0
     last_bridge = {"t": 0.0}
+    bridge_q: asyncio.Queue[Tuple[str, str]] = asyncio.Queue(maxsize=1)
+    # bridge phrases are fixed: synthesize once per language, then replay frames from memory
+    bridge_audio: Dict[str, List[Any]] = {}
+    prefetch_tasks: Dict[str, asyncio.Task] = {}
 
-    def _pick(ru: str, es: str, en: str) -> str:
+    def _current_lang() -> str:
         try:
-            cur = lang_state.get("current", "es")
+            return lang_state.get("current", "es")
         except Exception:
-            cur = "es"
-        return {"ru": ru, "es": es, "en": en}.get(cur, es)
+            return "es"
 
-    @session.on("agent_state_changed")
-    def _on_agent_state_changed(ev: "AgentStateChangedEvent"):
-        if getattr(ev, "new_state", "") != "thinking":
+    def _bridge_phrase() -> str:
+        return _BRIDGE_PHRASES.get(_current_lang(), _BRIDGE_PHRASES["es"])
+
+    async def _synthesize(lang: str, bridge: str) -> None:
+        tts = session.tts
+        if tts is None:
+            return
+        frames: List[Any] = []
+        async with tts.synthesize(bridge) as stream:
+            async for audio in stream:
+                frames.append(audio.frame)
+        if frames:
+            bridge_audio[lang] = frames
+
+    def _prefetch(lang: str, bridge: str) -> None:
+        if lang in bridge_audio or lang in prefetch_tasks:
             return
-        started = time.monotonic()
+        def _done(t: asyncio.Task) -> None:
+            # on failure the task is just dropped; the next bridge retries the synthesis
+            prefetch_tasks.pop(lang, None)
+            if not t.cancelled():
+                t.exception()
 
-        async def _say_if_still_thinking() -> None:
+        task = asyncio.create_task(_synthesize(lang, bridge))
+        prefetch_tasks[lang] = task
+        task.add_done_callback(_done)
+
+    async def _replay(frames: List[Any]) -> AsyncIterator[Any]:
+        for frame in frames:
+            yield frame
+
+    async def _say_if_still_thinking(lang: str, bridge: str) -> None:
+        await asyncio.sleep(bridge_delay_s)
+        if session.current_speech is not None:
+            return
+        if session.agent_state != "thinking":
+            return
+        if interaction_state.get("awaiting_user"):
+            return
+        now = time.monotonic()
+        if now - last_bridge["t"] < bridge_cooldown_s:
+            return
+        last_final = last_user_final_at.get("t", 0.0)
+        if last_final and now - last_final < bridge_delay_s:
+            await asyncio.sleep(0.2)
+            if session.agent_state != "thinking":
+                return
+        last_bridge["t"] = now
+        frames = bridge_audio.get(lang)
+        if frames is not None:
+            await session.say(
+                bridge,
+                audio=_replay(frames),
+                allow_interruptions=True,
+                add_to_chat_ctx=False,
+            )
+            return
+        # no cached audio yet (e.g. language just switched): speak via TTS, cache for next time
+        await session.say(bridge, allow_interruptions=True, add_to_chat_ctx=False)
+        _prefetch(lang, bridge)
+
+    async def _bridge_consumer() -> None:
+        while True:
+            lang, bridge = await bridge_q.get()
             try:
-                await asyncio.sleep(bridge_delay_ms / 1000.0)
-                if session.current_speech is not None:
-                    return
-                if getattr(session, "agent_state", "") != "thinking":
-                    return
-                if interaction_state.get("awaiting_user"):
-                    return
-                now = time.monotonic()
-                if (now - last_bridge["t"]) * 1000.0 < bridge_cooldown_ms:
-                    return
-                last_final = last_user_final_at.get("t", 0.0)
-                if last_final and now - last_final < (bridge_delay_ms / 1000.0):
-                    await asyncio.sleep(0.2)
-                    if getattr(session, "agent_state", "") != "thinking":
-                        return
-                bridge = _pick(
-                    ru="Секунду, сверяюсь с расписанием…",
-                    es="Un momento, reviso la agenda…",
-                    en="One sec, checking the schedule…",
-                )
-                last_bridge["t"] = now
-                await session.say(bridge, allow_interruptions=True, add_to_chat_ctx=False)
+                await _say_if_still_thinking(lang, bridge)
+            except asyncio.CancelledError:
+                raise
             except Exception:
-                return
+                continue
+
+    consumer = asyncio.create_task(_bridge_consumer())
+    # the starting language is known up front: synthesize its bridge off the hot path
+    _prefetch(_current_lang(), _bridge_phrase())
+
+    @session.on("agent_state_changed")
+    def _on_agent_state_changed(ev: "AgentStateChangedEvent"):
+        if ev.new_state != "thinking":
+            return
+        bridge = _bridge_phrase()
+        with contextlib.suppress(asyncio.QueueFull):
+            bridge_q.put_nowait((_current_lang(), bridge))
 
-        asyncio.create_task(_say_if_still_thinking())
+    async def _aclose() -> None:
+        for task in list(prefetch_tasks.values()):
+            task.cancel()
+        consumer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await consumer
 
     # store timestamps for external observation (optional)
     lang_state.setdefault("_bridge_registered", True)
+    return _aclose
@@ -1,59 +1,107 @@
 """Utilities to humanise schedule phrases for TTS output."""
 from __future__ import annotations
 
+import functools
+import os
 import re
-from typing import Iterable, Tuple
+from types import MappingProxyType
+from typing import Callable, Iterable, Mapping, Optional, Sequence, Tuple
 
 from .time_utils import format_time
 
 
 _TIME_PATTERN = re.compile(r"\b(?:[01]?\d|2[0-3]):[0-5]\d\b")
+_TIME_CAPTURE_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_TIME_BLOCK_RE = re.compile(r"(?:\b(?:[01]?\d|2[0-3]):[0-5]\d\b(?:\s*[,/\n]\s*)?){2,}")
+_HOURS_RU_RE = re.compile(
+    r"с\s*(\d{1,2}):(\d{2})\s*до\s*(\d{1,2}):(\d{2})\s*(?:и|,)\s*с\s*(\d{1,2}):(\d{2})\s*до\s*(\d{1,2}):(\d{2})",
+    flags=re.IGNORECASE,
+)
+_HOURS_ES_RE = re.compile(
+    r"de\s*(\d{1,2}):(\d{2})\s*a\s*(\d{1,2}):(\d{2})\s*(?:y|,)\s*de\s*(\d{1,2}):(\d{2})\s*a\s*(\d{1,2}):(\d{2})",
+    flags=re.IGNORECASE,
+)
+_HOURS_EN_RE = re.compile(
+    r"from\s*(\d{1,2}):(\d{2})\s*to\s*(\d{1,2}):(\d{2})\s*(?:and|,)\s*from\s*(\d{1,2}):(\d{2})\s*to\s*(\d{1,2}):(\d{2})",
+    flags=re.IGNORECASE,
+)
 
 
 def _extract_times(text: str) -> list[str]:
     return _TIME_PATTERN.findall(text or "")
 
 
+def _summarize_with(
+    pattern: re.Pattern[str], phrase_fn: Callable[[Sequence[str]], Optional[str]], text: str
+) -> tuple[str, bool]:
+    m = pattern.search(text)
+    if not m:
+        return text, False
+    phrase = phrase_fn(m.groups())
+    if phrase is None:
+        return text, False
+    return text[: m.start()] + phrase + text[m.end() :], True
+
+
 # --- Russian helpers -----------------------------------------------------
 
+# Слова для часов индексируются напрямую: h % 12 or 12 (индекс 0 не используется)
+_RU_HOURS = (
+    "",
+    "один",
+    "два",
+    "три",
+    "четыре",
+    "пять",
+    "шесть",
+    "семь",
+    "восемь",
+    "девять",
+    "десять",
+    "одиннадцать",
+    "двенадцать",
+)
+_RU_HOURS_GENITIVE = (
+    "",
+    "часа",
+    "двух",
+    "трёх",
+    "четырёх",
+    "пяти",
+    "шести",
+    "семи",
+    "восьми",
+    "девяти",
+    "десяти",
+    "одиннадцати",
+    "двенадцати",
+)
+# Минуты кратные пяти, индекс mm // 5
+_RU_MINUTES_BY_5 = (
+    "",
+    "пять",
+    "десять",
+    "пятнадцать",
+    "двадцать",
+    "двадцать пять",
+    "тридцать",
+    "тридцать пять",
+    "сорок",
+    "сорок пять",
+    "пятьдесят",
+    "пятьдесят пять",
+)
+_RU_MINUTE_PHRASE = {0: "", 15: "пятнадцати", 30: "тридцати", 45: "сорока пяти"}
+
+
 def _ru_number_word(n: int) -> str:
-    mapping = {
-        0: "ноль",
-        1: "один",
-        2: "два",
-        3: "три",
-        4: "четыре",
-        5: "пять",
-        6: "шесть",
-        7: "семь",
-        8: "восемь",
-        9: "девять",
-        10: "десять",
-        11: "одиннадцать",
-        12: "двенадцать",
-    }
-    x = n % 12
-    if x == 0:
-        x = 12
-    return mapping.get(x, str(x))
+    return _RU_HOURS[n % 12 or 12]
 
 
 def _ru_minute_simple(mm: int) -> str:
-    simple = {
-        0: "",
-        5: "пять",
-        10: "десять",
-        15: "пятнадцать",
-        20: "двадцать",
-        25: "двадцать пять",
-        30: "тридцать",
-        35: "тридцать пять",
-        40: "сорок",
-        45: "сорок пять",
-        50: "пятьдесят",
-        55: "пятьдесят пять",
-    }
-    return simple.get(mm, f"{mm}")
+    if 0 <= mm < 60 and mm % 5 == 0:
+        return _RU_MINUTES_BY_5[mm // 5]
+    return f"{mm}"
 
 
 def _ru_time_words(h: int, m: int) -> str:
@@ -63,42 +111,17 @@ def _ru_time_words(h: int, m: int) -> str:
 
 
 def _ru_hour_genitive(h: int) -> str:
-    mapping = {
-        1: "часа",
-        2: "двух",
-        3: "трёх",
-        4: "четырёх",
-        5: "пяти",
-        6: "шести",
-        7: "семи",
-        8: "восьми",
-        9: "девяти",
-        10: "десяти",
-        11: "одиннадцати",
-        12: "двенадцати",
-    }
-    x = h % 12
-    if x == 0:
-        x = 12
-    return mapping.get(x, "")
+    return _RU_HOURS_GENITIVE[h % 12 or 12]
 
 
 def _ru_minute_phrase(mm: int) -> str:
-    mapping = {0: "", 15: "пятнадцати", 30: "тридцати", 45: "сорока пяти"}
-    return mapping.get(mm, "")
+    return _RU_MINUTE_PHRASE.get(mm, "")
 
 
-def _summarize_hours_ru(text: str) -> tuple[str, bool]:
-    pattern = re.compile(
-        r"с\s*(\d{1,2}):(\d{2})\s*до\s*(\d{1,2}):(\d{2})\s*(?:и|,)\s*с\s*(\d{1,2}):(\d{2})\s*до\s*(\d{1,2}):(\d{2})",
-        flags=re.IGNORECASE,
-    )
-    m = pattern.search(text)
-    if not m:
-        return text, False
-    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, m.groups())
+def _hours_phrase_ru(groups: Sequence[str]) -> Optional[str]:
+    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, groups)
     if m1 not in (0, 15, 30, 45) or m4 not in (0, 15, 30, 45):
-        return text, False
+        return None
     start = _ru_hour_genitive(h1)
     end = _ru_hour_genitive(h4)
     start_min = _ru_minute_phrase(m1)
@@ -108,30 +131,30 @@ def _summarize_hours_ru(text: str) -> tuple[str, bool]:
     parts.extend(["до", end])
     phrase = " ".join(p for p in parts if p)
     phrase += ", с перерывом на обед"
-    return pattern.sub(phrase, text, count=1), True
+    return phrase
 
 
 # --- Spanish helpers -----------------------------------------------------
 
+_ES_HOURS = (
+    "",
+    "una",
+    "dos",
+    "tres",
+    "cuatro",
+    "cinco",
+    "seis",
+    "siete",
+    "ocho",
+    "nueve",
+    "diez",
+    "once",
+    "doce",
+)
+
+
 def _es_hour_word(h: int) -> str:
-    mapping = {
-        1: "una",
-        2: "dos",
-        3: "tres",
-        4: "cuatro",
-        5: "cinco",
-        6: "seis",
-        7: "siete",
-        8: "ocho",
-        9: "nueve",
-        10: "diez",
-        11: "once",
-        12: "doce",
-    }
-    x = h % 12
-    if x == 0:
-        x = 12
-    return mapping.get(x, str(x))
+    return _ES_HOURS[h % 12 or 12]
 
 
 def _es_time_phrase(h: int, m: int, *, article: bool = True) -> str:
@@ -147,44 +170,44 @@ def _es_time_phrase(h: int, m: int, *, article: bool = True) -> str:
     return f"las {_es_hour_word(h)}:{m:02d}" if article else f"{_es_hour_word(h)}:{m:02d}"
 
 
-def _summarize_hours_es(text: str) -> tuple[str, bool]:
-    pattern = re.compile(
-        r"de\s*(\d{1,2}):(\d{2})\s*a\s*(\d{1,2}):(\d{2})\s*(?:y|,)\s*de\s*(\d{1,2}):(\d{2})\s*a\s*(\d{1,2}):(\d{2})",
-        flags=re.IGNORECASE,
-    )
-    m = pattern.search(text)
-    if not m:
-        return text, False
-    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, m.groups())
+def _hours_phrase_es(groups: Sequence[str]) -> Optional[str]:
+    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, groups)
     if m1 not in (0, 15, 30, 45) or m4 not in (0, 15, 30, 45):
-        return text, False
+        return None
     start = _es_time_phrase(h1, m1)
     end = _es_time_phrase(h4, m4)
-    phrase = f"de {start} a {end}, con pausa para comer"
-    return pattern.sub(phrase, text, count=1), True
+    return f"de {start} a {end}, con pausa para comer"
 
 
 # --- English helpers -----------------------------------------------------
 
+_EN_HOURS = (
+    "",
+    "one",
+    "two",
+    "three",
+    "four",
+    "five",
+    "six",
+    "seven",
+    "eight",
+    "nine",
+    "ten",
+    "eleven",
+    "twelve",
+)
+_EN_MINUTES = {
+    5: "five",
+    10: "ten",
+    20: "twenty",
+    25: "twenty-five",
+    35: "thirty-five",
+    40: "forty",
+}
+
+
 def _en_hour_word(h: int) -> str:
-    mapping = {
-        1: "one",
-        2: "two",
-        3: "three",
-        4: "four",
-        5: "five",
-        6: "six",
-        7: "seven",
-        8: "eight",
-        9: "nine",
-        10: "ten",
-        11: "eleven",
-        12: "twelve",
-    }
-    x = h % 12
-    if x == 0:
-        x = 12
-    return mapping.get(x, str(x))
+    return _EN_HOURS[h % 12 or 12]
 
 
 def _en_time_phrase(h: int, m: int) -> str:
@@ -196,75 +219,66 @@ def _en_time_phrase(h: int, m: int) -> str:
         return f"quarter past {_en_hour_word(h)}"
     if m == 45:
         return f"quarter to {_en_hour_word(h + 1)}"
-    minutes = {
-        5: "five",
-        10: "ten",
-        20: "twenty",
-        25: "twenty-five",
-        35: "thirty-five",
-        40: "forty",
-    }.get(m, f"{m:02d}")
+    minutes = _EN_MINUTES.get(m) or f"{m:02d}"
     return f"{_en_hour_word(h)} {minutes}"
 
 
-def _summarize_hours_en(text: str) -> tuple[str, bool]:
-    pattern = re.compile(
-        r"from\s*(\d{1,2}):(\d{2})\s*to\s*(\d{1,2}):(\d{2})\s*(?:and|,)\s*from\s*(\d{1,2}):(\d{2})\s*to\s*(\d{1,2}):(\d{2})",
-        flags=re.IGNORECASE,
-    )
-    m = pattern.search(text)
-    if not m:
-        return text, False
-    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, m.groups())
+def _hours_phrase_en(groups: Sequence[str]) -> Optional[str]:
+    h1, m1, h2, m2, h3, m3, h4, m4 = map(int, groups)
     if m1 not in (0, 15, 30, 45) or m4 not in (0, 15, 30, 45):
-        return text, False
+        return None
     start = _en_time_phrase(h1, m1)
     end = _en_time_phrase(h4, m4)
-    phrase = f"from {start} to {end}, with a lunch break"
-    return pattern.sub(phrase, text, count=1), True
+    return f"from {start} to {end}, with a lunch break"
 
 
 # --- Public API ----------------------------------------------------------
 
+
+def has_clock_time(text: str) -> bool:
+    """Cheap prefilter: True if some ':' has a digit on both sides.
+
+    Every pattern rewritten here (lone times, slot lists, opening hours)
+    needs that, so text failing the check can skip the regex pipeline.
+    """
+    i = text.find(":")
+    last = len(text) - 1
+    while i != -1:
+        if 0 < i < last and text[i - 1].isdigit() and text[i + 1].isdigit():
+            return True
+        i = text.find(":", i + 1)
+    return False
+
+
+_JOIN_CONJ = {"ru": " и ", "es": " y ", "en": " and "}
+
+
+def _value_words(value: str, lang: str) -> str:
+    try:
+        hh, _, mm = value.partition(":")
+        words = _time_words(int(hh), int(mm), lang)
+    except (TypeError, ValueError):
+        return format_time(value)
+    return format_time(value) if words is None else words
+
+
 def _join_times(times: Iterable[str], lang: str) -> str:
     if not times:
         return ""
     lang = lang or "es"
-    if lang == "ru":
-        parts = []
-        for value in times:
-            try:
-                hh, mm = value.split(":")
-                parts.append(_ru_time_words(int(hh), int(mm)))
-            except Exception:
-                parts.append(format_time(value))
-    elif lang == "es":
-        parts = []
-        for value in times:
-            try:
-                hh, mm = value.split(":")
-                parts.append(_es_time_phrase(int(hh), int(mm), article=False))
-            except Exception:
-                parts.append(format_time(value))
-    elif lang == "en":
-        parts = []
-        for value in times:
-            try:
-                hh, mm = value.split(":")
-                parts.append(_en_time_phrase(int(hh), int(mm)))
-            except Exception:
-                parts.append(format_time(value))
-    else:
-        parts = [format_time(value) for value in times]
-
-    parts = list(parts)
+    parts = [_value_words(value, lang) for value in times]
     if len(parts) == 1:
         return parts[0]
-    conj = {"ru": " и ", "es": " y ", "en": " and "}.get(lang, " y ")
+    conj = _JOIN_CONJ.get(lang, " y ")
+    if len(parts) == 2:
+        return parts[0] + conj + parts[1]
     return ", ".join(parts[:-1]) + conj + parts[-1]
 
 
+@functools.lru_cache(maxsize=512)
 def humanize_slots(text: str, lang: str) -> tuple[str, bool]:
+    if not has_clock_time(text):
+        return text, False
     times = _extract_times(text)
     if len(times) < 2:
         return text, False
@@ -273,33 +287,123 @@ def humanize_slots(text: str, lang: str) -> tuple[str, bool]:
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
         if all(ln in times for ln in lines):
             return joined, True
-    pattern = re.compile(r"(?:\b(?:[01]?\d|2[0-3]):[0-5]\d\b(?:\s*[,/\n]\s*)?){2,}")
-    new_text, n = pattern.subn(joined, text, count=1)
+    new_text, n = _TIME_BLOCK_RE.subn(joined, text, count=1)
     if n > 0:
         return new_text, True
     return f"{text.rstrip()} — {joined}", True
 
 
+@functools.lru_cache(maxsize=512)
 def replace_time_with_words(text: str, lang: str) -> str:
+    fn = _TIME_WORDS_BY_LANG.get(lang)
+    if fn is None:
+        # unsupported language: every match would be kept as is
+        return text
+
     def repl(match: re.Match[str]) -> str:
-        hh = int(match.group(1))
-        mm = int(match.group(2))
-        if lang == "ru":
-            return _ru_time_words(hh, mm)
-        if lang == "es":
-            return _es_time_phrase(hh, mm, article=False)
-        if lang == "en":
-            return _en_time_phrase(hh, mm)
-        return match.group(0)
+        return fn(int(match.group(1)), int(match.group(2)))
 
-    return re.sub(r"\b([01]?\d|2[0-3]):([0-5]\d)\b", repl, text)
+    return _TIME_CAPTURE_RE.sub(repl, text)
 
 
+@functools.lru_cache(maxsize=512)
 def summarize_hours(text: str, lang: str) -> tuple[str, bool]:
-    if lang == "ru":
-        return _summarize_hours_ru(text)
-    if lang == "es":
-        return _summarize_hours_es(text)
-    if lang == "en":
-        return _summarize_hours_en(text)
-    return text, False
+    entry = _HOURS_BY_LANG.get(lang)
+    if entry is None or not has_clock_time(text):
+        return text, False
+    return _summarize_with(entry[0], entry[1], text)
+
+
+def _es_time_words(hh: int, mm: int) -> str:
+    return _es_time_phrase(hh, mm, article=False)
+
+
+# Per-language tables keyed by short code (read-only views)
+_HOURS_BY_LANG = MappingProxyType(
+    {
+        "ru": (_HOURS_RU_RE, _hours_phrase_ru),
+        "es": (_HOURS_ES_RE, _hours_phrase_es),
+        "en": (_HOURS_EN_RE, _hours_phrase_en),
+    }
+)
+_TIME_WORDS_BY_LANG: Mapping[str, Callable[[int, int], str]] = MappingProxyType(
+    {"ru": _ru_time_words, "es": _es_time_words, "en": _en_time_phrase}
+)
+
+
+def _time_words(hh: int, mm: int, lang: str) -> Optional[str]:
+    fn = _TIME_WORDS_BY_LANG.get(lang)
+    return None if fn is None else fn(hh, mm)
+
+
+@functools.lru_cache(maxsize=1)
+def _regex_engine():
+    """Regex module for the combined scanner: stdlib ``re`` unless TTS_REGEX_ENGINE=re2.
+
+    google-re2 matches in linear time, which only matters for batch/replay
+    workloads; note its ``\\b`` is ASCII-only, unlike ``re``.
+    """
+    if os.getenv("TTS_REGEX_ENGINE", "re").strip().lower() == "re2":
+        try:
+            import re2  # type: ignore[import-not-found]
+
+            return re2
+        except ImportError:
+            pass
+    return re
+
+
+@functools.cache
+def _combined_re(lang: str, humanize: bool, summarize: bool) -> Optional[re.Pattern[str]]:
+    branches = []
+    if summarize and lang in _HOURS_BY_LANG:
+        # всегда первая ветка: внутренние группы часов получают номера 2..9
+        branches.append(f"(?P<hours>{_HOURS_BY_LANG[lang][0].pattern})")
+    if humanize:
+        branches.append(f"(?P<times>{_TIME_BLOCK_RE.pattern})")
+        branches.append(f"(?P<time>{_TIME_PATTERN.pattern})")
+    if not branches:
+        return None
+    # флаг инлайном: одинаково понимают и re, и re2
+    return _regex_engine().compile("(?i)" + "|".join(branches))
+
+
+@functools.lru_cache(maxsize=1024)
+def rewrite_times(
+    text: str, lang: str, *, humanize: bool = True, summarize: bool = True
+) -> tuple[str, bool]:
+    """Single-pass equivalent of humanize_slots + replace_time_with_words + summarize_hours.
+
+    One alternation is scanned once: a two-interval opening-hours phrase is
+    summarised, a run of 2+ adjacent times becomes one spoken list, and any
+    remaining lone time is spelled out in words. The result is a pure function
+    of the arguments, so repeated chunks (greetings, bridges, hours) are memoised.
+    """
+    pattern = _combined_re(lang, humanize, summarize)
+    if pattern is None:
+        return text, False
+
+    def _dispatch(m: re.Match[str]) -> str:
+        kind = m.lastgroup
+        chunk = m.group(0)
+        if kind == "hours":
+            phrase = _HOURS_BY_LANG[lang][1](m.groups()[1:9])
+            if phrase is not None:
+                return phrase
+            return replace_time_with_words(chunk, lang) if humanize else chunk
+        if kind == "times":
+            times = _TIME_PATTERN.findall(chunk)
+            last = chunk.rfind(times[-1]) + len(times[-1])
+            return _join_times(times[:3], lang) + chunk[last:]
+        hh, _, mm = chunk.partition(":")
+        words = _time_words(int(hh), int(mm), lang)
+        return chunk if words is None else words
+
+    new_text = pattern.sub(_dispatch, text)
+    return new_text, new_text != text
+
+
+def precompile_rewriters(*, humanize: bool = True, summarize: bool = True) -> None:
+    """Compile the combined scanner for every language up front (e.g. in worker prewarm)."""
+    for lang in _TIME_WORDS_BY_LANG:
+        _combined_re(lang, humanize, summarize)
@@ -1,17 +1,30 @@
 """SSML builder for Azure TTS responses."""
 from __future__ import annotations
 
-import os
 import re
 
+_EMOJI_RE = re.compile(r"[\U00010000-\U0010FFFF]")
 
-def build_ssml(text: str, lang_long: str) -> str:
-    rate = os.getenv("TTS_PROSODY_RATE", "fast")
-    pitch = os.getenv("TTS_PROSODY_PITCH", "medium")
-    volume = os.getenv("TTS_PROSODY_VOLUME", "medium")
-    style = os.getenv("TTS_STYLE", "chat")
-    degree = os.getenv("TTS_STYLE_DEGREE", "1.0")
-    cleaned = re.sub(r"[\U00010000-\U0010FFFF]", "", text)
+
+def _strip_astral(text: str) -> str:
+    """Drop non-BMP codepoints (emoji); ASCII-only text is returned untouched."""
+    if text.isascii():
+        return text
+    return _EMOJI_RE.sub("", text)
+
+
+def build_ssml(
+    text: str,
+    lang_long: str,
+    *,
+    rate: str,
+    pitch: str,
+    volume: str,
+    style: str,
+    degree: str,
+) -> str:
+    """Wrap text in Azure SSML with the given (already validated) prosody and style."""
+    cleaned = _strip_astral(text)
     return (
         f"<speak version=\"1.0\" xml:lang=\"{lang_long}\" xmlns:mstts=\"http://www.w3.org/2001/mstts\">"
         f"<mstts:express-as style=\"{style}\" styledegree=\"{degree}\">"
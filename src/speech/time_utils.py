@@ -1,6 +1,8 @@
 """Helpers for working with time strings and language normalisation."""
 from __future__ import annotations
 
+from typing import Any, Dict, Optional
+
 
 def format_time(value: str) -> str:
     """Return a time string without a leading zero in hours."""
@@ -9,15 +11,27 @@ def format_time(value: str) -> str:
     return value
 
 
+_SHORT_LANGS = {"es": "es", "ru": "ru", "en": "en"}
+
+
 def normalize_lang_tag(tag: str | None) -> str:
     """Collapse locale variants (es-ES, ru-RU, en-US) to short codes."""
     if not tag:
         return "es"
-    lowered = tag.lower()
-    if lowered.startswith("es"):
-        return "es"
-    if lowered.startswith("ru"):
-        return "ru"
-    if lowered.startswith("en"):
-        return "en"
-    return "es"
+    return _SHORT_LANGS.get(tag[:2].lower(), "es")
+
+
+def lang_switch_target(lang_state: Dict[str, Any], tag: str) -> Optional[str]:
+    """Short code to switch to for a final STT language tag, or None to stay.
+
+    The raw tag is remembered together with the language it confirmed, so a
+    repeated tag skips normalisation only while that language is still current.
+    """
+    current = lang_state["current"]
+    if lang_state.get("last_raw") == (tag, current):
+        return None
+    detected = normalize_lang_tag(tag)
+    if detected == current:
+        lang_state["last_raw"] = (tag, current)
+        return None
+    return detected
@@ -2,6 +2,7 @@
 
 from .toolbox import (
     load_barber_db,
+    set_external_db,
     get_services,
     get_price,
     get_open_hours,
@@ -15,6 +16,7 @@ from .toolbox import (
 
 __all__ = [
     "load_barber_db",
+    "set_external_db",
     "get_services",
     "get_price",
     "get_open_hours",
@@ -3,9 +3,8 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta
 from typing import Dict, List
-from zoneinfo import ZoneInfo
 
-from .hours import WDAYS_MAP, parse_time, weekday_name_ru, StoreInfo
+from .hours import WDAYS, weekday_name_ru, StoreInfo
 
 
 def generate_slots(
@@ -15,27 +14,26 @@ def generate_slots(
     step_minutes: int = 30,
     count: int = 3,
 ) -> List[Dict[str, str]]:
-    tz = ZoneInfo(store.timezone or "Europe/Madrid")
+    tz = store.tz
     aware_dt = base_dt.astimezone(tz) if base_dt.tzinfo else base_dt.replace(tzinfo=tz)
     slots: List[Dict[str, str]] = []
+    step = timedelta(minutes=step_minutes)
 
     for offset in range(7):
         current = aware_dt + timedelta(days=offset)
-        weekday = WDAYS_MAP[current.weekday()]
-        intervals = store.hours.get(weekday, [])
+        weekday = WDAYS[current.weekday()]
+        intervals = store.hours_parsed.get(weekday, [])
         if not intervals:
             continue
+        # Everything that depends only on the day is formatted once, outside the slot loop
+        day = current.date()
+        weekday_ru = weekday_name_ru(weekday)
+        date_str = f"{day.year:04d}-{day.month:02d}-{day.day:02d}"
+        label_prefix = f"{weekday_ru.capitalize()} {day.day:02d}.{day.month:02d} в "
 
-        for interval in intervals:
-            try:
-                raw_start, raw_end = interval.split("-", 1)
-                start_t = parse_time(raw_start)
-                end_t = parse_time(raw_end)
-            except Exception:
-                continue
-
-            interval_start = datetime.combine(current.date(), start_t, tzinfo=tz)
-            interval_end = datetime.combine(current.date(), end_t, tzinfo=tz)
+        for start_t, end_t in intervals:
+            interval_start = datetime.combine(day, start_t, tzinfo=tz)
+            interval_end = datetime.combine(day, end_t, tzinfo=tz)
             if interval_end <= aware_dt and offset == 0:
                 continue
 
@@ -45,22 +43,23 @@ def generate_slots(
             if remainder != 0:
                 first_slot += timedelta(minutes=step_minutes - remainder)
 
-            step = timedelta(minutes=step_minutes)
             slot_time = first_slot
 
             while slot_time < interval_end:
                 slot_end = slot_time + step
                 if slot_end > interval_end:
                     break
+                # Plain int formatting instead of strftime: same output, no libc round-trip
+                hhmm = f"{slot_time.hour:02d}:{slot_time.minute:02d}"
                 slots.append(
                     {
                         "iso": slot_time.isoformat(timespec="minutes"),
-                        "date": slot_time.date().isoformat(),
-                        "time": slot_time.strftime("%H:%M"),
-                        "end_time": slot_end.strftime("%H:%M"),
+                        "date": date_str,
+                        "time": hhmm,
+                        "end_time": f"{slot_end.hour:02d}:{slot_end.minute:02d}",
                         "weekday": weekday,
-                        "weekday_ru": weekday_name_ru(weekday),
-                        "label": f"{weekday_name_ru(weekday).capitalize()} {slot_time.strftime('%d.%m')} в {slot_time.strftime('%H:%M')}",
+                        "weekday_ru": weekday_ru,
+                        "label": label_prefix + hhmm,
                     }
                 )
                 if len(slots) >= count:
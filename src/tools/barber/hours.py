@@ -4,10 +4,26 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass, field
 from datetime import time
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, FrozenSet, List, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+_ADDRESS_RE = re.compile(r"Address:\s*([^\n]+)")
+_PHONE_RE = re.compile(r"Phone:\s*([^,\n]+)")
+_EMAIL_RE = re.compile(r"email:\s*([^\s;]+)", flags=re.IGNORECASE)
+_HOURS_RE = re.compile(r"Hours:\s*([^\n]+)")
+_ADDRESS_RU_RE = re.compile(r"Адрес:\s*([^\n]+)")
+_PHONE_RU_RE = re.compile(r"Телефон:\s*([^,\n]+)")
+_HOURS_RU_RE = re.compile(r"Часы:\s*([^\n]+)")
+_INSTAGRAM_RE = re.compile(r"Instagram\s*\(@([^\)]+)\)")
+_PHILOSOPHY_RE = re.compile(r"Философия:([^\[]+)")
+_COMMUNITY_RE = re.compile(r"Комьюнити:([^\[]+)")
 
 DAY_NAMES = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+# Two laps of the week, so a wrapping range like Sat-Tue is one slice
+_DAY_RING = tuple(DAY_NAMES * 2)
 DAY_INDEX = {name: idx for idx, name in enumerate(DAY_NAMES)}
+# Indexed by datetime.weekday(); WDAYS_MAP is kept for external callers
+WDAYS: Tuple[str, ...] = tuple(DAY_NAMES)
 WDAYS_MAP = {idx: name for idx, name in enumerate(DAY_NAMES)}
 
 
@@ -23,6 +39,27 @@ class StoreInfo:
     socials: Dict[str, str] = field(default_factory=dict)
     notes: Dict[str, str] = field(default_factory=dict)
     holidays: List[str] = field(default_factory=list)
+    # Membership views of holidays/closed days and the resolved zone, built once for per-date checks
+    holidays_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    closed_days_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    tz: ZoneInfo = field(init=False, repr=False, compare=False)
+    # `hours` stays text for tool output; slot generation uses the parsed (start, end) pairs
+    hours_parsed: Dict[str, List[Tuple[time, time]]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.holidays_set = frozenset(self.holidays)
+        self.closed_days_set = frozenset(self.closed_days)
+        self.tz = ZoneInfo(self.timezone or "Europe/Madrid")
+        self.hours_parsed = {}
+        for day, intervals in self.hours.items():
+            parsed: List[Tuple[time, time]] = []
+            for interval in intervals:
+                try:
+                    raw_start, raw_end = interval.split("-", 1)
+                    parsed.append((parse_time(raw_start), parse_time(raw_end)))
+                except Exception:
+                    continue
+            self.hours_parsed[day] = parsed
 
 
 def expand_day_token(token: str) -> List[str]:
@@ -39,10 +76,7 @@ def expand_day_token(token: str) -> List[str]:
     end_idx = DAY_INDEX[end]
     if end_idx < start_idx:
         end_idx += 7
-    days: List[str] = []
-    for offset in range(start_idx, end_idx + 1):
-        days.append(DAY_NAMES[offset % 7])
-    return days
+    return list(_DAY_RING[start_idx : end_idx + 1])
 
 
 def parse_hours_line(line: str) -> Tuple[Dict[str, List[str]], List[str]]:
@@ -132,42 +166,42 @@ def parse_store_info(text: str) -> StoreInfo:
     notes: Dict[str, str] = {}
     hours_line = ""
 
-    address_match = re.search(r"Address:\s*([^\n]+)", text)
+    address_match = _ADDRESS_RE.search(text)
     if address_match:
         address = address_match.group(1).strip().rstrip(".")
 
-    phone_match = re.search(r"Phone:\s*([^,\n]+)", text)
+    phone_match = _PHONE_RE.search(text)
     if phone_match:
         phone = phone_match.group(1).strip()
 
-    email_match = re.search(r"email:\s*([^\s;]+)", text, flags=re.IGNORECASE)
+    email_match = _EMAIL_RE.search(text)
     if email_match:
         email = email_match.group(1).strip()
 
-    hours_match = re.search(r"Hours:\s*([^\n]+)", text)
+    hours_match = _HOURS_RE.search(text)
     if hours_match:
         hours_line = hours_match.group(1).strip()
 
     if not address:
-        address_match_ru = re.search(r"Адрес:\s*([^\n]+)", text)
+        address_match_ru = _ADDRESS_RU_RE.search(text)
         if address_match_ru:
             address = address_match_ru.group(1).strip().rstrip(".")
     if not phone:
-        phone_match_ru = re.search(r"Телефон:\s*([^,\n]+)", text)
+        phone_match_ru = _PHONE_RU_RE.search(text)
         if phone_match_ru:
             phone = phone_match_ru.group(1).strip()
     if not email:
-        email_match_ru = re.search(r"email:\s*([^\s;]+)", text, flags=re.IGNORECASE)
+        email_match_ru = _EMAIL_RE.search(text)
         if email_match_ru:
             email = email_match_ru.group(1).strip()
     if not hours_line:
-        hours_match_ru = re.search(r"Часы:\s*([^\n]+)", text)
+        hours_match_ru = _HOURS_RU_RE.search(text)
         if hours_match_ru:
             hours_line = hours_match_ru.group(1).strip()
 
     hours, closed_days = parse_hours_line(hours_line)
 
-    socials_match = re.search(r"Instagram\s*\(@([^\)]+)\)", text)
+    socials_match = _INSTAGRAM_RE.search(text)
     if socials_match:
         socials["instagram"] = f"@{socials_match.group(1).strip()}"
     if "Facebook" in text:
@@ -175,11 +209,11 @@ def parse_store_info(text: str) -> StoreInfo:
     if "Twitter" in text:
         socials.setdefault("twitter", "@betran")
 
-    philosophy_match = re.search(r"Философия:([^\[]+)", text)
+    philosophy_match = _PHILOSOPHY_RE.search(text)
     if philosophy_match:
         notes["philosophy"] = philosophy_match.group(1).strip()
 
-    community_match = re.search(r"Комьюнити:([^\[]+)", text)
+    community_match = _COMMUNITY_RE.search(text)
     if community_match:
         notes["community"] = community_match.group(1).strip()
 
@@ -4,7 +4,16 @@ from __future__ import annotations
 import re
 from typing import Optional
 
-from .services import BarberDB, Service, normalize_text
+from .services import BarberDB, Service, normalize_text, strip_qualifiers
+
+# service_index keys are lowercased codes; defaults for generic "haircut" queries
+_GENERIC_DEFAULTS = {"beard": "svc002", "female": "svc016", "kids": "svc003", "default": "svc001"}
+
+# Intent signals in a lowercased query, one alternation per group
+_GENERIC_RE = re.compile(r"стрижка|corte|haircut|подстричь|подстричься")
+_BEARD_RE = re.compile(r"бород|barba|beard")
+_FEMALE_RE = re.compile(r"жен|дев|chica|girl|woman|mujer")
+_KIDS_RE = re.compile(r"дет|реб|niñ|kid|peque")
 
 
 def match_service(db: BarberDB, query: str) -> Optional[Service]:
@@ -12,25 +21,20 @@ def match_service(db: BarberDB, query: str) -> Optional[Service]:
         return None
     key = (query or "").strip().lower()
 
-    generic_tokens = {"стрижка", "corte", "haircut", "подстричь", "подстричься"}
-    beard_signals = any(tok in key for tok in ["бород", "barba", "beard"])
-    female_signals = any(tok in key for tok in ["жен", "дев", "chica", "girl", "woman", "mujer"])
-    kids_signals = any(tok in key for tok in ["дет", "реб", "niñ", "kid", "peque"])
-
-    if any(tok in key for tok in generic_tokens):
-        if beard_signals:
-            cand = db.service_index.get("svc002") or db.service_index.get("SVC002")
+    if _GENERIC_RE.search(key):
+        if _BEARD_RE.search(key):
+            cand = db.service_index.get(_GENERIC_DEFAULTS["beard"])
             if cand:
                 return cand
-        if female_signals:
-            cand = db.service_index.get("svc016") or db.service_index.get("SVC016")
+        if _FEMALE_RE.search(key):
+            cand = db.service_index.get(_GENERIC_DEFAULTS["female"])
             if cand:
                 return cand
-        if kids_signals:
-            cand = db.service_index.get("svc003") or db.service_index.get("SVC003")
+        if _KIDS_RE.search(key):
+            cand = db.service_index.get(_GENERIC_DEFAULTS["kids"])
             if cand:
                 return cand
-        cand = db.service_index.get("svc001") or db.service_index.get("SVC001")
+        cand = db.service_index.get(_GENERIC_DEFAULTS["default"])
         if cand:
             return cand
 
@@ -44,9 +48,10 @@ def match_service(db: BarberDB, query: str) -> Optional[Service]:
         if found:
             return found
 
-    q2 = re.sub(r"\s*\[[^\]]*\]\s*", " ", query)
-    q2 = re.sub(r"\s*\([^\)]*\)\s*", " ", q2)
-    normalized2 = normalize_text(q2)
+    # Without brackets the second pass would look up the key that already missed
+    if "[" not in query and "(" not in query:
+        return None
+    normalized2 = normalize_text(strip_qualifiers(query))
     for code in db.service_keywords.get(normalized2, []):
         found = db.service_index.get(code.lower())
         if found:
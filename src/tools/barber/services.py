@@ -1,16 +1,40 @@
 """Data models and parsing helpers for the salon knowledge base."""
 from __future__ import annotations
 
+import functools
 import re
 import unicodedata
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
-
-from livekit.agents import get_job_context
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 from .hours import StoreInfo
 
+_SLUG_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_NORMALIZE_DROP_RE = re.compile(r"[^0-9a-zA-Zа-яА-ЯёЁ]+")
+_DURATION_DIGITS_RE = re.compile(r"(\d+)")
+_BRACKETS_RE = re.compile(r"\s*\[[^\]]*\]\s*")
+_PARENS_RE = re.compile(r"\s*\([^\)]*\)\s*")
+_WS_RE = re.compile(r"\s+")
+_NAME_SPLIT_RE = re.compile(r"[+/,&]")
+
+# (tag, keyword alternation) rules for classify_service, checked in order
+_SERVICE_TAG_RULES: Tuple[Tuple[str, re.Pattern[str]], ...] = tuple(
+    (tag, re.compile("|".join(words)))
+    for tag, words in (
+        ("men_cuts", ("hombre", "caballer", "men", "caballero")),
+        ("barber_beard", ("barba", "barber", "afeitado")),
+        ("kids", ("niñ", "kid", "peques")),
+        ("color", ("color", "mech", "balay", "ilumin", "baño")),
+        ("highlights", ("mech", "balay", "ilumin")),
+        ("styling", ("secado", "peinad", "waves", "plancha", "iron")),
+        ("treatments", ("enzimo", "tanino", "tratamiento", "therapy", "keratin", "nutric")),
+        ("smoothing", ("alis", "tanino", "enzimo")),
+        ("braids", ("trenza",)),
+        ("perms", ("perman",)),
+    )
+)
+
 
 @dataclass
 class Service:
@@ -32,6 +56,13 @@ class StaffMember:
     weekly_days_off: List[str]
     time_off_dates: List[str] = field(default_factory=list)
     service_codes: List[str] = field(default_factory=list)
+    # Membership views of the lists above, built once for per-date checks
+    weekly_days_off_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    time_off_dates_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.weekly_days_off_set = frozenset(self.weekly_days_off)
+        self.time_off_dates_set = frozenset(self.time_off_dates)
 
 
 @dataclass
@@ -45,6 +76,16 @@ class BarberDB:
     service_keywords: Dict[str, List[str]]
     service_tags: Dict[str, List[str]]
     currency: str = "EUR"
+    # Tool response projections, built once by load_barber_db (parallel to services/staff)
+    services_payload: List[Dict[str, Any]] = field(default_factory=list)
+    staff_payload: List[Dict[str, Any]] = field(default_factory=list)
+    # id -> member (first one wins on duplicate ids, like the old linear scan)
+    staff_index: Dict[str, StaffMember] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.staff_index = {}
+        for member in self.staff:
+            self.staff_index.setdefault(member.id, member)
 
 
 def read_text(path: Path) -> str:
@@ -53,23 +94,36 @@ def read_text(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
 
-def slugify(text: str) -> str:
+def _fold(text: str) -> str:
+    """NFKD, drop combining marks, lowercase: the shared prologue of slugify/normalize_text."""
     norm = unicodedata.normalize("NFKD", text)
-    norm = "".join(ch for ch in norm if not unicodedata.combining(ch))
-    norm = norm.lower()
-    norm = re.sub(r"[^a-z0-9]+", "_", norm)
+    # ASCII has no combining marks: skip the per-character filter
+    if not norm.isascii():
+        norm = "".join(ch for ch in norm if not unicodedata.combining(ch))
+    return norm.lower()
+
+
+@functools.lru_cache(maxsize=4096)
+def slugify(text: str) -> str:
+    norm = _SLUG_NON_ALNUM_RE.sub("_", _fold(text))
     norm = norm.strip("_")
     return norm or "item"
 
 
+# Pure functions of the input; match_service calls normalize_text on every query
+@functools.lru_cache(maxsize=4096)
 def normalize_text(text: str) -> str:
-    norm = unicodedata.normalize("NFKD", text or "")
-    norm = "".join(ch for ch in norm if not unicodedata.combining(ch))
-    norm = norm.lower()
-    norm = re.sub(r"[^0-9a-zA-Zа-яА-ЯёЁ]+", " ", norm)
+    norm = _NORMALIZE_DROP_RE.sub(" ", _fold(text or ""))
     return norm.strip()
 
 
+def strip_qualifiers(text: str) -> str:
+    """Drop bracketed/parenthesised qualifiers and collapse whitespace."""
+    text = _BRACKETS_RE.sub(" ", text)
+    text = _PARENS_RE.sub(" ", text)
+    return _WS_RE.sub(" ", text).strip()
+
+
 def parse_services_catalog(text: str) -> List[Service]:
     services: List[Service] = []
     category = "General"
@@ -105,7 +159,7 @@ def parse_services_catalog(text: str) -> List[Service]:
                 price_eur = None
 
         duration_min: Optional[int] = None
-        duration_match = re.search(r"(\d+)", duration_text)
+        duration_match = _DURATION_DIGITS_RE.search(duration_text)
         if duration_match:
             try:
                 duration_min = int(duration_match.group(1))
@@ -157,6 +211,9 @@ def parse_master_profiles(text: str, store_hours: Dict[str, List[str]], store_cl
     staff: List[StaffMember] = []
     in_tips = False
     default_days_off = list(store_closed)
+    # The parser gives every master the store schedule and nothing mutates it later:
+    # copy it once (detached from store.hours) and share it between members
+    shared_schedule = {day: list(slots) for day, slots in store_hours.items()}
     for raw_line in text.splitlines():
         line = raw_line.strip()
         if not line or line.startswith("Профили"):
@@ -175,14 +232,13 @@ def parse_master_profiles(text: str, store_hours: Dict[str, List[str]], store_cl
         name = name_part.strip()
         summary = summary_part.strip()
         specialties = infer_specialties(summary)
-        schedule = {day: list(slots) for day, slots in store_hours.items()}
         staff.append(
             StaffMember(
                 id=slugify(name),
                 name=name,
                 summary=summary,
                 specialties=specialties,
-                schedule=schedule,
+                schedule=shared_schedule,
                 weekly_days_off=list(default_days_off),
             )
         )
@@ -191,54 +247,30 @@ def parse_master_profiles(text: str, store_hours: Dict[str, List[str]], store_cl
 
 def build_service_index(services: Iterable[Service]) -> Tuple[Dict[str, Service], Dict[str, List[str]]]:
     by_id: Dict[str, Service] = {}
-    keywords: Dict[str, List[str]] = {}
+    # dict-as-ordered-set: O(1) dedupe, first-seen code order kept for match_service
+    keywords: Dict[str, Dict[str, None]] = {}
 
     def add_keyword(key: str, code: str) -> None:
         normalized = normalize_text(key)
         if not normalized:
             return
-        keywords.setdefault(normalized, [])
-        if code not in keywords[normalized]:
-            keywords[normalized].append(code)
+        keywords.setdefault(normalized, {})[code] = None
 
     for svc in services:
         by_id[svc.code.lower()] = svc
-        by_id.setdefault(svc.code, svc)
         add_keyword(svc.code, svc.code)
         add_keyword(svc.name, svc.code)
-        base_name = re.sub(r"\s*\[[^\]]*\]\s*", " ", svc.name)
-        base_name = re.sub(r"\s*\([^\)]*\)\s*", " ", base_name)
-        base_name = re.sub(r"\s+", " ", base_name).strip()
+        base_name = strip_qualifiers(svc.name)
         if base_name and base_name.lower() != svc.name.lower():
             add_keyword(base_name, svc.code)
-        for part in re.split(r"[+/,&]", svc.name):
+        for part in _NAME_SPLIT_RE.split(svc.name):
             add_keyword(part, svc.code)
-    return by_id, keywords
+    return by_id, {key: list(codes) for key, codes in keywords.items()}
 
 
 def classify_service(service: Service) -> List[str]:
     tokens = f"{service.category} {service.name}".lower()
-    tags: List[str] = []
-    if any(word in tokens for word in ["hombre", "caballer", "men", "caballero"]):
-        tags.append("men_cuts")
-    if any(word in tokens for word in ["barba", "barber", "afeitado"]):
-        tags.append("barber_beard")
-    if any(word in tokens for word in ["niñ", "kid", "peques"]):
-        tags.append("kids")
-    if any(word in tokens for word in ["color", "mech", "balay", "ilumin", "baño"]):
-        tags.append("color")
-    if any(word in tokens for word in ["mech", "balay", "ilumin"]):
-        tags.append("highlights")
-    if any(word in tokens for word in ["secado", "peinad", "waves", "plancha", "iron"]):
-        tags.append("styling")
-    if any(word in tokens for word in ["enzimo", "tanino", "tratamiento", "therapy", "keratin", "nutric"]):
-        tags.append("treatments")
-    if any(word in tokens for word in ["alis", "tanino", "enzimo"]):
-        tags.append("smoothing")
-    if "trenza" in tokens:
-        tags.append("braids")
-    if "perman" in tokens:
-        tags.append("perms")
+    tags = [tag for tag, pattern in _SERVICE_TAG_RULES if pattern.search(tokens)]
     if not tags:
         tags.append("generalist")
     return sorted(set(tags))
@@ -249,5 +281,7 @@ def build_service_tags(services: Iterable[Service]) -> Dict[str, List[str]]:
 
 
 def get_db() -> BarberDB:
+    from livekit.agents import get_job_context
+
     ctx = get_job_context()
     return ctx.proc.userdata["barber_db"]
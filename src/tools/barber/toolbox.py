@@ -2,23 +2,21 @@
 from __future__ import annotations
 
 import csv
+import functools
 import hashlib
 import json
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence
-from zoneinfo import ZoneInfo
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
 
 try:  # pragma: no cover
     from livekit.agents.llm import function_tool, RunContext
 except Exception:  # pragma: no cover
     from livekit.agents import function_tool, RunContext  # type: ignore
 
-from livekit.agents import get_job_context
-
 from .availability import generate_slots
-from .hours import StoreInfo, WDAYS_MAP, parse_store_info
+from .hours import StoreInfo, WDAYS, parse_store_info
 from .matching import match_service
 from .services import (
     BarberDB,
@@ -42,6 +40,12 @@ def set_external_db(db: BarberDB) -> None:
 
 
 def load_barber_db(base_dir: str | Path) -> BarberDB:
+    # Same directory -> same immutable DB: repeated prewarm/fallback loads reuse it
+    return _load_barber_db(str(Path(base_dir).resolve()))
+
+
+@functools.lru_cache(maxsize=4)
+def _load_barber_db(base_dir: str) -> BarberDB:
     base = Path(base_dir)
 
     services_text = read_text(base / "bertran_services_catalog.txt")
@@ -56,14 +60,18 @@ def load_barber_db(base_dir: str | Path) -> BarberDB:
     service_index, service_keywords = build_service_index(services)
     service_tags = build_service_tags(services)
 
+    # tag -> positions in `services`, so each member only visits its own tags
+    tag_index: Dict[str, List[int]] = {}
+    for pos, svc in enumerate(services):
+        for tag in service_tags.get(svc.code.lower(), []):
+            tag_index.setdefault(tag, []).append(pos)
+    all_codes = sorted(svc.code for svc in services)
     for member in staff:
-        member_tags = set(member.specialties)
-        matched_codes: List[str] = []
-        for svc in services:
-            tags = service_tags.get(svc.code.lower(), [])
-            if "generalist" in member_tags or member_tags.intersection(tags):
-                matched_codes.append(svc.code)
-        member.service_codes = sorted(matched_codes)
+        if "generalist" in member.specialties:
+            member.service_codes = list(all_codes)
+            continue
+        positions = {pos for tag in member.specialties for pos in tag_index.get(tag, ())}
+        member.service_codes = sorted(services[pos].code for pos in positions)
 
     knowledge = {
         "facts": facts_text.strip(),
@@ -72,7 +80,7 @@ def load_barber_db(base_dir: str | Path) -> BarberDB:
         "salon_story": knowledge_plain.strip(),
     }
 
-    return BarberDB(
+    db = BarberDB(
         store=store,
         services=services,
         staff=staff,
@@ -82,30 +90,58 @@ def load_barber_db(base_dir: str | Path) -> BarberDB:
         service_keywords=service_keywords,
         service_tags=service_tags,
     )
+    # get_services / list_staff answers don't depend on call arguments: project once
+    db.services_payload = [_service_payload(svc, db) for svc in services]
+    db.staff_payload = [_list_staff_payload(member, db) for member in staff]
+    return db
 
 
 def _get_db() -> BarberDB:
     if _EXTERNAL_DB is not None:
         return _EXTERNAL_DB
     try:
+        # Only reached until the first DB is cached, so import on demand
+        from livekit.agents import get_job_context
+
         ctx = get_job_context()
-        return ctx.proc.userdata["barber_db"]
+        db = ctx.proc.userdata["barber_db"]
     except Exception:
         # Fallback for non-worker runs: load once from disk
         base = Path("db/barber")
-        # cache in EXTERNAL_DB to avoid reloading
         db = load_barber_db(base)
-        set_external_db(db)
-        return db
+    # The DB is immutable after prewarm: remember it for the rest of the process
+    set_external_db(db)
+    return db
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_iso(value: str) -> Optional[datetime]:
+    """datetime.fromisoformat, memoised: tools of one turn keep asking about the same dates."""
+    try:
+        return datetime.fromisoformat(value)
+    except Exception:
+        return None
 
 
 def _is_holiday(store: StoreInfo, date_iso: str) -> bool:
     date_key = (date_iso or "")[:10]
-    return date_key in set(store.holidays)
+    return date_key in store.holidays_set
+
+
+def _service_payload(svc: Service, db: BarberDB) -> Dict[str, Any]:
+    return {
+        "id": svc.code,
+        "name": svc.name,
+        "category": svc.category,
+        "duration_min": svc.duration_min,
+        "price_text": svc.price_text,
+        "price_eur": svc.price_eur,
+        "tags": db.service_tags.get(svc.code.lower(), []),
+    }
 
 
 def _staff_by_id(db: BarberDB, staff_id: str) -> Optional[StaffMember]:
-    return next((member for member in db.staff if member.id == staff_id), None)
+    return db.staff_index.get(staff_id)
 
 
 @function_tool(
@@ -117,7 +153,7 @@ def _staff_by_id(db: BarberDB, staff_id: str) -> Optional[StaffMember]:
 )
 async def resolve_date(context: RunContext, query: str, prefer_morning: bool = False) -> Dict[str, Any]:
     db = _get_db()
-    tz = ZoneInfo(db.store.timezone or "Europe/Madrid")
+    tz = db.store.tz
     now = datetime.now(tz)
     text = (query or "").strip()
     try:
@@ -174,7 +210,7 @@ async def resolve_date(context: RunContext, query: str, prefer_morning: bool = F
         target = dt.astimezone(tz)
 
     date_str = target.date().isoformat()
-    weekday = WDAYS_MAP[target.weekday()]
+    weekday = WDAYS[target.weekday()]
     hour = 9 if prefer_morning else 8
     start_iso = datetime(target.year, target.month, target.day, hour, 0, tzinfo=tz).isoformat(timespec="minutes")
     return {"ok": True, "date": date_str, "weekday": weekday, "start_iso": start_iso}
@@ -186,20 +222,7 @@ async def resolve_date(context: RunContext, query: str, prefer_morning: bool = F
 )
 async def get_services(context: RunContext, locale: str = "ru") -> Dict[str, Any]:
     db = _get_db()
-    out = []
-    for svc in db.services:
-        out.append(
-            {
-                "id": svc.code,
-                "name": svc.name,
-                "category": svc.category,
-                "duration_min": svc.duration_min,
-                "price_text": svc.price_text,
-                "price_eur": svc.price_eur,
-                "tags": db.service_tags.get(svc.code.lower(), []),
-            }
-        )
-    return {"currency": db.currency, "services": out}
+    return {"currency": db.currency, "services": list(db.services_payload)}
 
 
 @function_tool(
@@ -213,15 +236,7 @@ async def get_price(context: RunContext, service: str, locale: str = "ru") -> Di
         return {"ok": False, "error": "service_not_found", "query": service}
     return {
         "ok": True,
-        "service": {
-            "id": svc.code,
-            "name": svc.name,
-            "category": svc.category,
-            "duration_min": svc.duration_min,
-            "price_text": svc.price_text,
-            "price_eur": svc.price_eur,
-            "tags": db.service_tags.get(svc.code.lower(), []),
-        },
+        "service": _service_payload(svc, db),
         "currency": db.currency,
     }
 
@@ -249,23 +264,23 @@ async def get_open_hours(context: RunContext, date_iso: Optional[str] = None) ->
             }
         }
 
-    try:
-        dt = datetime.fromisoformat(date_iso)
-    except Exception:
+    dt = _parse_iso(date_iso)
+    if dt is None:
         return {"ok": False, "error": "bad_date"}
 
-    tz = ZoneInfo(store.timezone or "Europe/Madrid")
+    tz = store.tz
     dt = dt.astimezone(tz) if dt.tzinfo else dt.replace(tzinfo=tz)
-    weekday = WDAYS_MAP[dt.weekday()]
+    weekday = WDAYS[dt.weekday()]
 
-    if weekday in store.closed_days or _is_holiday(store, date_iso):
+    holiday = _is_holiday(store, date_iso)
+    if weekday in store.closed_days_set or holiday:
         return {
             "ok": True,
             "date": dt.date().isoformat(),
             "weekday": weekday,
             "open": False,
             "hours": [],
-            "reason": "holiday" if _is_holiday(store, date_iso) else "closed",
+            "reason": "holiday" if holiday else "closed",
         }
 
     return {
@@ -287,19 +302,21 @@ def _list_staff_payload(member: StaffMember, db: BarberDB) -> Dict[str, Any]:
     }
 
 
-def _bookable_staff_ids() -> Sequence[str]:
+@functools.lru_cache(maxsize=1)
+def _bookable_staff_ids() -> FrozenSet[str]:
+    """Staff ids with a bookable calendar; env is parsed once per process."""
     raw = os.getenv("GCAL_CALENDAR_MAP", "") or os.getenv("BOOKING_STAFF_IDS", "")
     if not raw:
-        return []
+        return frozenset()
     try:
         mapping = json.loads(raw)
         if isinstance(mapping, dict):
-            return list(mapping.keys())
+            return frozenset(mapping.keys())
         if isinstance(mapping, list):
-            return [str(item) for item in mapping]
+            return frozenset(str(item) for item in mapping)
     except Exception:
-        return []
-    return []
+        return frozenset()
+    return frozenset()
 
 
 @function_tool(
@@ -310,12 +327,12 @@ def _bookable_staff_ids() -> Sequence[str]:
 )
 async def list_staff(context: RunContext, locale: str = "ru", bookable_only: bool = False) -> Dict[str, Any]:
     db = _get_db()
-    staff = db.staff
+    staff = db.staff_payload
     if bookable_only:
-        allowed = set(_bookable_staff_ids())
+        allowed = _bookable_staff_ids()
         if allowed:
-            staff = [member for member in staff if member.id in allowed]
-    return {"ok": True, "staff": [_list_staff_payload(member, db) for member in staff]}
+            staff = [payload for payload in staff if payload["id"] in allowed]
+    return {"ok": True, "staff": list(staff)}
 
 
 @function_tool(
@@ -328,19 +345,18 @@ async def get_staff_day(context: RunContext, staff_id: str, date_iso: str) -> Di
     if not staff:
         return {"ok": False, "error": "staff_not_found"}
 
-    tz = ZoneInfo(db.store.timezone or "Europe/Madrid")
-    try:
-        dt = datetime.fromisoformat(date_iso)
-    except Exception:
+    tz = db.store.tz
+    dt = _parse_iso(date_iso)
+    if dt is None:
         return {"ok": False, "error": "bad_date"}
     dt = dt.astimezone(tz) if dt.tzinfo else dt.replace(tzinfo=tz)
-    weekday = WDAYS_MAP[dt.weekday()]
+    weekday = WDAYS[dt.weekday()]
 
-    weekly_off = set(staff.weekly_days_off)
+    weekly_off = staff.weekly_days_off_set
     date_key = dt.date().isoformat()
-    time_off_dates = set(staff.time_off_dates)
+    time_off_dates = staff.time_off_dates_set
     holiday = _is_holiday(db.store, date_iso)
-    store_closed = weekday in db.store.closed_days
+    store_closed = weekday in db.store.closed_days_set
 
     shifts_by_wday = staff.schedule.get(weekday, [])
     working = bool(shifts_by_wday) and not (
@@ -360,7 +376,7 @@ async def get_staff_day(context: RunContext, staff_id: str, date_iso: str) -> Di
     return {
         "ok": True,
         "staff_id": staff_id,
-        "date": dt.date().isoformat(),
+        "date": date_key,
         "weekday": weekday,
         "working": working,
         "shifts": shifts_by_wday if working else [],
@@ -388,32 +404,34 @@ async def get_staff_week(
         return {"ok": False, "error": "staff_not_found"}
 
     store = db.store
-    tz = ZoneInfo(store.timezone or "Europe/Madrid")
+    tz = store.tz
 
     if start_iso:
-        try:
-            base_dt = datetime.fromisoformat(start_iso)
-            if base_dt.tzinfo is None:
-                base_dt = base_dt.replace(tzinfo=tz)
-            else:
-                base_dt = base_dt.astimezone(tz)
-        except Exception:
+        base_dt = _parse_iso(start_iso)
+        if base_dt is None:
             return {"ok": False, "error": "bad_start_iso"}
+        if base_dt.tzinfo is None:
+            base_dt = base_dt.replace(tzinfo=tz)
+        else:
+            base_dt = base_dt.astimezone(tz)
     else:
         base_dt = datetime.now(tz)
 
     days = max(1, min(int(days or 7), 14))
 
+    weekly_off = staff.weekly_days_off_set
+    time_off_dates = staff.time_off_dates_set
+    closed_days = store.closed_days_set
+    holidays = store.holidays_set
+    # aware + timedelta is wall-clock arithmetic, so plain dates give the same calendar days
+    base_date = base_dt.date()
     items: List[Dict[str, Any]] = []
     for offset in range(days):
-        dt = base_dt + timedelta(days=offset)
-        weekday = WDAYS_MAP[dt.weekday()]
-        weekly_off = set(staff.weekly_days_off)
-        date_iso = dt.isoformat(timespec="minutes")
-        date_key = date_iso[:10]
-        time_off_dates = set(staff.time_off_dates)
-        holiday = _is_holiday(store, date_iso)
-        store_closed = weekday in store.closed_days
+        day = base_date + timedelta(days=offset)
+        weekday = WDAYS[day.weekday()]
+        date_key = day.isoformat()
+        holiday = date_key in holidays
+        store_closed = weekday in closed_days
 
         shifts_by_wday = staff.schedule.get(weekday, [])
         working = bool(shifts_by_wday) and not (
@@ -432,7 +450,7 @@ async def get_staff_week(
 
         items.append(
             {
-                "date": dt.date().isoformat(),
+                "date": date_key,
                 "weekday": weekday,
                 "working": working,
                 "shifts": shifts_by_wday if working else [],
@@ -470,8 +488,8 @@ def _duration_from_services(
 
 def _filter_slots_by_staff(raw: List[Dict[str, Any]], staff: StaffMember) -> List[Dict[str, Any]]:
     filtered = []
-    time_off_dates = set(staff.time_off_dates)
-    weekly_off = set(staff.weekly_days_off)
+    time_off_dates = staff.time_off_dates_set
+    weekly_off = staff.weekly_days_off_set
     for slot in raw:
         date_iso = slot["iso"]
         weekday = slot.get("weekday")
@@ -503,17 +521,16 @@ async def suggest_slots(
 ) -> Dict[str, Any]:
     db = _get_db()
     store = db.store
-    tz = ZoneInfo(store.timezone or "Europe/Madrid")
+    tz = store.tz
 
     if start_iso:
-        try:
-            base_dt = datetime.fromisoformat(start_iso)
-            if base_dt.tzinfo is None:
-                base_dt = base_dt.replace(tzinfo=tz)
-            else:
-                base_dt = base_dt.astimezone(tz)
-        except Exception:
+        base_dt = _parse_iso(start_iso)
+        if base_dt is None:
             return {"ok": False, "error": "bad_start_iso"}
+        if base_dt.tzinfo is None:
+            base_dt = base_dt.replace(tzinfo=tz)
+        else:
+            base_dt = base_dt.astimezone(tz)
     else:
         base_dt = datetime.now(tz)
 
@@ -1,7 +1,68 @@
+import dataclasses
+import functools
+import json
 from pathlib import Path
+from typing import Any, BinaryIO, Optional
 
+try:  # orjson опционален (extra `orjson`): сериализует в C и сразу отдаёт UTF-8 bytes
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+
+# Промпты не меняются во время работы процесса — читаем и декодируем каждый файл один раз
+@functools.lru_cache(maxsize=32)
 def read_text(path: str, default: str = "") -> str:
     p = Path(path)
     if p.exists():
         return p.read_text(encoding="utf-8").strip()
     return default
+
+
+def _json_default(obj: Any) -> Any:
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Компактный JSON в UTF-8: orjson, если установлен, иначе stdlib (dataclass → dict)."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+def transcript_line(item: Any) -> bytes:
+    """Одна запись NDJSON-транскрипта: элемент истории в компактном JSON + перевод строки."""
+    return json_dumps(item.model_dump(mode="json", exclude_none=True)) + b"\n"
+
+
+class TranscriptWriter:
+    """NDJSON-транскрипт сессии: дописываем элементы истории по мере появления.
+
+    Файл открывается на входе в контекст и закрывается на выходе. Каждая запись сразу
+    сбрасывается на диск, чтобы транскрипт не терялся при аварийном завершении
+    воркера; запись вне открытого контекста игнорируется.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fp: Optional[BinaryIO] = None
+
+    def __enter__(self) -> "TranscriptWriter":
+        self._fp = open(self.path, "ab")
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        fp, self._fp = self._fp, None
+        if fp is not None:
+            fp.close()
+
+    def write(self, *items: Any) -> None:
+        fp = self._fp
+        if fp is None or not items:
+            return
+        fp.write(b"".join(transcript_line(item) for item in items))
+        fp.flush()
@@ -0,0 +1,133 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+pytest.importorskip("livekit.agents")  # tools.barber registers LiveKit function tools
+
+from tools.barber.availability import generate_slots
+from tools.barber.hours import WDAYS_MAP, StoreInfo, parse_time, weekday_name_ru
+
+_HOURS = {
+    "Mon": ["09:30-13:30", "15:30-20:00"],
+    "Tue": [],
+    "Wed": ["09:30-13:30", "15:30-20:00"],
+    "Thu": ["09:30-13:30", "15:30-20:00"],
+    "Fri": ["09:30-13:30", "15:30-20:00", "bad"],
+    "Sat": ["09:30-13:30"],
+    "Sun": [],
+}
+
+
+def _store(timezone: str = "Europe/Madrid") -> StoreInfo:
+    return StoreInfo(
+        name="Betrán Estilistas",
+        address="",
+        phone="",
+        email="",
+        timezone=timezone,
+        hours=_HOURS,
+        closed_days=["Tue", "Sun"],
+        holidays=["2026-12-25", "2027-01-01"],
+    )
+
+
+def _reference_slots(store, base_dt, *, step_minutes=30, count=3):
+    """generate_slots as it was before intervals and the timezone were pre-parsed."""
+    tz = ZoneInfo(store.timezone or "Europe/Madrid")
+    aware_dt = base_dt.astimezone(tz) if base_dt.tzinfo else base_dt.replace(tzinfo=tz)
+    slots = []
+    for offset in range(7):
+        current = aware_dt + timedelta(days=offset)
+        weekday = WDAYS_MAP[current.weekday()]
+        for interval in store.hours.get(weekday, []):
+            try:
+                raw_start, raw_end = interval.split("-", 1)
+                start_t = parse_time(raw_start)
+                end_t = parse_time(raw_end)
+            except Exception:
+                continue
+            interval_start = datetime.combine(current.date(), start_t, tzinfo=tz)
+            interval_end = datetime.combine(current.date(), end_t, tzinfo=tz)
+            if interval_end <= aware_dt and offset == 0:
+                continue
+            first_slot = max(
+                interval_start, aware_dt if offset == 0 else interval_start
+            )
+            first_slot = first_slot.replace(second=0, microsecond=0)
+            remainder = first_slot.minute % step_minutes
+            if remainder != 0:
+                first_slot += timedelta(minutes=step_minutes - remainder)
+            step = timedelta(minutes=step_minutes)
+            slot_time = first_slot
+            while slot_time < interval_end:
+                slot_end = slot_time + step
+                if slot_end > interval_end:
+                    break
+                slots.append(
+                    {
+                        "iso": slot_time.isoformat(timespec="minutes"),
+                        "date": slot_time.date().isoformat(),
+                        "time": slot_time.strftime("%H:%M"),
+                        "end_time": slot_end.strftime("%H:%M"),
+                        "weekday": weekday,
+                        "weekday_ru": weekday_name_ru(weekday),
+                        "label": f"{weekday_name_ru(weekday).capitalize()} {slot_time.strftime('%d.%m')} в {slot_time.strftime('%H:%M')}",
+                    }
+                )
+                if len(slots) >= count:
+                    return slots
+                slot_time += step
+    return slots
+
+
+def test_store_info_resolves_timezone() -> None:
+    assert _store().tz.key == "Europe/Madrid"
+    assert _store(timezone="").tz.key == "Europe/Madrid"
+    assert _store(timezone="Europe/Moscow").tz.key == "Europe/Moscow"
+
+
+def test_store_info_preparses_hours() -> None:
+    store = _store()
+    assert store.hours_parsed["Mon"] == [
+        (time(9, 30), time(13, 30)),
+        (time(15, 30), time(20, 0)),
+    ]
+    assert store.hours_parsed["Tue"] == []
+    # malformed intervals are dropped, as the per-call parser did
+    assert store.hours_parsed["Fri"] == store.hours_parsed["Mon"]
+    # the text form is what the tools return, so it stays untouched
+    assert store.hours == _HOURS
+
+
+def test_store_info_day_sets() -> None:
+    store = _store()
+    assert store.holidays_set == frozenset(store.holidays)
+    assert store.closed_days_set == frozenset(store.closed_days)
+
+
+@pytest.mark.parametrize("step_minutes", [15, 30, 45])
+def test_generate_slots_matches_reference(step_minutes: int) -> None:
+    store = _store()
+    madrid = ZoneInfo("Europe/Madrid")
+    starts = []
+    # a week around each DST switch plus an ordinary week, at odd minutes
+    for day0 in (datetime(2026, 3, 26), datetime(2026, 10, 22), datetime(2026, 6, 1)):
+        for hours in range(0, 24 * 7, 5):
+            starts.append(day0 + timedelta(hours=hours, minutes=7 * hours % 60))
+    for naive in starts:
+        for base_dt in (
+            naive,
+            naive.replace(tzinfo=madrid),
+            naive.replace(tzinfo=ZoneInfo("UTC")),
+        ):
+            for count in (1, 3, 40):
+                expected = _reference_slots(
+                    store, base_dt, step_minutes=step_minutes, count=count
+                )
+                assert (
+                    generate_slots(
+                        store, base_dt, step_minutes=step_minutes, count=count
+                    )
+                    == expected
+                )
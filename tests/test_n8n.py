@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from clients import n8n
+
+
+class _FakeClient:
+    """Records aclose() calls instead of owning a connection pool."""
+
+    def __init__(self, **kwargs):
+        self.is_closed = False
+
+    async def aclose(self) -> None:
+        self.is_closed = True
+
+
+@pytest.fixture(autouse=True)
+def _fresh_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(n8n.httpx, "AsyncClient", _FakeClient)
+    monkeypatch.setattr(n8n, "_CLIENT", None)
+    monkeypatch.setattr(n8n, "_SESSIONS", 0)
+
+
+async def test_retain_closes_client_after_last_release() -> None:
+    first = n8n.retain()
+    second = n8n.retain()
+    client = n8n._get_client()
+
+    await first()
+    assert n8n._CLIENT is client and not client.is_closed
+
+    # a repeated shutdown callback must not release the other session's hold
+    await first()
+    assert n8n._SESSIONS == 1 and not client.is_closed
+
+    await second()
+    assert client.is_closed and n8n._CLIENT is None
+    await second()
+    assert n8n._SESSIONS == 0
+
+
+async def test_get_client_reopens_after_last_release() -> None:
+    release = n8n.retain()
+    client = n8n._get_client()
+    await release()
+
+    again = n8n._get_client()
+    assert again is not client and not again.is_closed
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from speech import (
+    has_clock_time,
+    lang_switch_target,
+    replace_time_with_words,
+    rewrite_times,
+    summarize_hours,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("10:30", True),
+        ("x 9:0 y", True),
+        ("Te espero a las 17:45.", True),
+        ("", False),
+        ("Sin horas aquí.", False),
+        ("a:1", False),
+        ("1:", False),
+        (":5", False),
+        ("12: 30", False),
+        ("1::2", False),
+    ],
+)
+def test_has_clock_time(text: str, expected: bool) -> None:
+    assert has_clock_time(text) is expected
+
+
+def test_rewrite_times_skips_text_without_clock_time() -> None:
+    # has_clock_time is the prefilter in tts_node: whatever it rejects must come back unchanged
+    rng = random.Random(0)
+    alphabet = "0123456789:;, .-abcxyzяюñ\n"
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        if has_clock_time(text):
+            continue
+        for lang in ("es", "ru", "en"):
+            assert rewrite_times(text, lang) == (text, False)
+
+
+@pytest.mark.parametrize(
+    ("text", "lang", "expected"),
+    [
+        ("Te espero a las 17:45.", "es", "Te espero a las seis menos cuarto."),
+        (
+            "Встреча в 10:30, потом в 12:00.",
+            "ru",
+            "Встреча в десять тридцать, потом в двенадцать.",
+        ),
+        (
+            "Slots: 10:00, 10:30, 11:00, 11:30",
+            "en",
+            "Slots: ten, half past ten and eleven",
+        ),
+        (
+            "Abrimos de 9:30 a 13:30 y de 15:30 a 20:00.",
+            "es",
+            "Abrimos de las nueve y media a las ocho, con pausa para comer.",
+        ),
+        (
+            "Работаем с 9:30 до 13:30 и с 15:30 до 20:00.",
+            "ru",
+            "Работаем с девяти тридцати до восьми, с перерывом на обед.",
+        ),
+        (
+            "We open from 9:30 to 13:30 and from 15:30 to 20:00.",
+            "en",
+            "We open from half past nine to eight, with a lunch break.",
+        ),
+    ],
+)
+def test_rewrite_times(text: str, lang: str, expected: str) -> None:
+    assert rewrite_times(text, lang) == (expected, True)
+
+
+def test_rewrite_times_unknown_language_is_untouched() -> None:
+    assert rewrite_times("At 10:30 ok", "de") == ("At 10:30 ok", False)
+
+
+def test_rewrite_times_respects_flags() -> None:
+    hours = "Abrimos de 9:30 a 13:30 y de 15:30 a 20:00."
+    # without humanize only the opening-hours phrase is rewritten
+    assert rewrite_times("Te espero a las 17:45.", "es", humanize=False) == (
+        "Te espero a las 17:45.",
+        False,
+    )
+    assert rewrite_times(hours, "es", humanize=False) == summarize_hours(hours, "es")
+    # without summarize the hours phrase is spelled out time by time
+    assert rewrite_times(hours, "es", summarize=False) == (
+        "Abrimos de nueve y media a una y media y de tres y media a ocho.",
+        True,
+    )
+    assert rewrite_times(hours, "es", humanize=False, summarize=False) == (hours, False)
+
+
+@pytest.mark.parametrize("lang", ["es", "ru", "en"])
+def test_rewrite_times_lone_time_matches_legacy_helper(lang: str) -> None:
+    for hh in range(24):
+        for mm in (0, 5, 15, 30, 45):
+            text = f"a las {hh}:{mm:02d} vale"
+            expected = replace_time_with_words(text, lang)
+            assert rewrite_times(text, lang) == (expected, expected != text)
+
+
+def test_lang_switch_target_confirms_and_switches() -> None:
+    state = {"current": "es", "switched_once": False, "last_raw": None}
+    assert lang_switch_target(state, "es-ES") is None
+    assert state["last_raw"] == ("es-ES", "es")
+    # the cached tag short-circuits while es is current
+    assert lang_switch_target(state, "es-ES") is None
+    assert lang_switch_target(state, "ru-RU") == "ru"
+    # a switch is only committed by the async task; until then ru is asked again
+    assert lang_switch_target(state, "ru-RU") == "ru"
+
+
+def test_lang_switch_target_switches_back_to_previous_language() -> None:
+    state = {"current": "es", "switched_once": False, "last_raw": None}
+    assert lang_switch_target(state, "es-ES") is None
+    assert lang_switch_target(state, "ru-RU") == "ru"
+    state["current"] = "ru"  # what _apply_lang_switch does once it finishes
+    # the tag cached while es was current must not hide the way back
+    assert lang_switch_target(state, "es-ES") == "es"
+    assert lang_switch_target(state, "ru-RU") is None
+    assert lang_switch_target(state, "es-ES") == "es"
+    state["current"] = "es"
+    assert lang_switch_target(state, "es-ES") is None
+    assert lang_switch_target(state, "en-US") == "en"
@@ -0,0 +1,78 @@
+import dataclasses
+import importlib.util
+import json
+from pathlib import Path
+
+from src.utils import TranscriptWriter, json_dumps
+
+_SCRIPT = Path(__file__).resolve().parent.parent / "scripts" / "render_transcript.py"
+_spec = importlib.util.spec_from_file_location("render_transcript", _SCRIPT)
+render_transcript = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(render_transcript)
+
+
+class _Item:
+    """Stand-in for a chat history item: only model_dump() is used by the writer."""
+
+    def __init__(self, **data):
+        self.data = data
+
+    def model_dump(self, **kwargs):
+        return self.data
+
+
+_ITEMS = [
+    _Item(type="message", role="user", content=["Hola, ¿tenéis hueco mañana?"]),
+    _Item(type="function_call", name="suggest_slots", arguments='{"count": 3}'),
+    _Item(type="function_call_output", name="suggest_slots", output='{"ok": true}'),
+    _Item(type="message", role="assistant", content=["Sí, a las diez."]),
+]
+
+
+def test_json_dumps_is_compact_utf8() -> None:
+    @dataclasses.dataclass
+    class Usage:
+        tokens: int
+        lang: str
+
+    out = json_dumps({"usage": Usage(3, "ру"), 1: None})
+    assert out == '{"usage":{"tokens":3,"lang":"ру"},"1":null}'.encode()
+
+
+def test_transcript_writer_appends_ndjson(tmp_path: Path) -> None:
+    path = tmp_path / "transcript.ndjson"
+    writer = TranscriptWriter(str(path))
+    writer.write(_ITEMS[0])  # not entered yet: ignored
+    with writer:
+        writer.write(_ITEMS[0])
+        writer.write(*_ITEMS[1:])
+        # every record is flushed right away
+        assert len(path.read_bytes().splitlines()) == len(_ITEMS)
+    writer.write(_ITEMS[0])  # closed: ignored
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [item.data for item in _ITEMS]
+
+    # a reconnecting session appends to the same file
+    with TranscriptWriter(str(path)) as again:
+        again.write(_ITEMS[-1])
+    assert len(path.read_text(encoding="utf-8").splitlines()) == len(_ITEMS) + 1
+
+
+def test_load_history_reads_ndjson_and_legacy_dump(tmp_path: Path) -> None:
+    ndjson = tmp_path / "transcript.ndjson"
+    with TranscriptWriter(str(ndjson)) as writer:
+        writer.write(*_ITEMS)
+    legacy = tmp_path / "transcript.json"
+    legacy.write_text(
+        json.dumps({"items": [item.data for item in _ITEMS]}), encoding="utf-8"
+    )
+
+    for src in (ndjson, legacy):
+        history = render_transcript.load_history(src)
+        assert history == {"items": [item.data for item in _ITEMS]}
+        # tool calls are kept in the file but have no text to render
+        assert list(render_transcript.extract_messages(history)) == [
+            ("user", "Hola, ¿tenéis hueco mañana?"),
+            ("assistant", "Sí, a las diez."),
+        ]